@@ -1,11 +1,21 @@
 """Fiscal Document Agent core with LangChain and Gemini."""
 
+import copy
+import hashlib
+import json
 import logging
-from typing import Any
+import queue
+import threading
+import time
+from typing import Any, Iterator, Optional
 
+from google.ai import generativelanguage_v1beta as glm
+from google.protobuf import duration_pb2, field_mask_pb2
 from langchain.agents import AgentExecutor, create_react_agent
 from langchain.memory import ConversationBufferMemory
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.prompts import PromptTemplate
+from langchain_core.tools import render_text_description
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 from src.agent.prompts import SYSTEM_PROMPT, USER_GREETING
@@ -13,6 +23,178 @@ from src.agent.tools import ALL_TOOLS
 
 logger = logging.getLogger(__name__)
 
+# Gemini context cache for the static prompt prefix (system prompt + tools)
+PROMPT_CACHE_TTL_SECONDS = 3600
+PROMPT_CACHE_REFRESH_SECONDS = 55 * 60
+
+# Static part of the ReAct prompt: identical on every call
+REACT_INSTRUCTIONS = f"""
+{SYSTEM_PROMPT}
+
+FERRAMENTAS:
+{{tools}}
+
+FORMATO DE USO DAS FERRAMENTAS:
+Para usar uma ferramenta, use este formato EXATO:
+
+Thought: [seu raciocínio sobre o que fazer]
+Action: [nome da ferramenta]
+Action Input: [entrada para a ferramenta]
+Observation: [resultado da ferramenta]
+
+Quando tiver a resposta final:
+Thought: Tenho a resposta final
+Final Answer: [sua resposta ao usuário]
+"""
+
+# Per-call part of the ReAct prompt
+REACT_CONVERSATION = """
+HISTÓRICO DA CONVERSA:
+{chat_history}
+
+PERGUNTA DO USUÁRIO: {input}
+
+SEUS NOMES DE FERRAMENTAS: {tool_names}
+
+{agent_scratchpad}
+"""
+
+
+class FinalAnswerStreamHandler(BaseCallbackHandler):
+    """
+    Forward LLM tokens to a queue once the ReAct "Final Answer:" is reached.
+
+    Thought/Action steps are buffered and discarded, so only the text the
+    user would see from chat() is streamed.
+    """
+
+    ANSWER_PREFIX = "Final Answer:"
+
+    def __init__(self, token_queue: queue.Queue):
+        """
+        Initialize the handler.
+
+        Args:
+            token_queue: Queue receiving answer tokens
+        """
+        self.token_queue = token_queue
+        self._buffer = ""
+        self._answer_reached = False
+
+    def on_llm_start(self, *args: Any, **kwargs: Any) -> None:
+        """Reset state at the start of each agent step."""
+        self._buffer = ""
+        self._answer_reached = False
+
+    def on_chat_model_start(self, *args: Any, **kwargs: Any) -> None:
+        """Reset state at the start of each agent step (chat models)."""
+        self.on_llm_start()
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        """Forward the token if the final answer has started."""
+        if self._answer_reached:
+            self.token_queue.put(token)
+            return
+
+        self._buffer += token
+        idx = self._buffer.find(self.ANSWER_PREFIX)
+        if idx >= 0:
+            self._answer_reached = True
+            answer_start = self._buffer[idx + len(self.ANSWER_PREFIX):].lstrip()
+            if answer_start:
+                self.token_queue.put(answer_start)
+
+
+def _render_instructions() -> str:
+    """Return the static prompt prefix with the tool descriptions filled in."""
+    return REACT_INSTRUCTIONS.replace("{tools}", render_text_description(ALL_TOOLS))
+
+
+class PromptCache:
+    """
+    Gemini cached context holding the static prompt prefix.
+
+    One instance belongs to the shared agent build and is reused by every
+    fork, so all sessions see the same cache name. The context is created
+    on first use rather than while the agent is constructed, and any
+    failure leaves the agent sending the full prompt.
+    """
+
+    def __init__(self, llm: ChatGoogleGenerativeAI, api_key: str, model_name: str):
+        """
+        Initialize the cache (no network call is made here).
+
+        Args:
+            llm: Shared LLM client whose ``cached_content`` is kept in sync
+            api_key: Google Gemini API key
+            model_name: Gemini model the context is created for
+        """
+        self.llm = llm
+        self.api_key = api_key
+        self.model_name = model_name
+        self.name: Optional[str] = None
+        self._attempted = False
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+
+    def ensure(self) -> None:
+        """Create the cached context on first use, or extend it before it expires."""
+        with self._lock:
+            if not self._attempted:
+                self._attempted = True
+                self._set_name(self._create())
+                return
+            age = time.monotonic() - self._refreshed_at
+            if self.name and age >= PROMPT_CACHE_REFRESH_SECONDS:
+                self._refresh()
+
+    def _set_name(self, name: Optional[str]) -> None:
+        """Point the shared LLM client at the cached context (or at none)."""
+        self.name = name
+        self.llm.cached_content = name
+
+    def _create(self) -> Optional[str]:
+        """
+        Create the cached context.
+
+        Returns:
+            Cached content name, or None if caching is unavailable (the
+            full prompt is then sent on every call, as before)
+        """
+        try:
+            client = glm.CacheServiceClient(client_options={"api_key": self.api_key})
+            cache = client.create_cached_content(
+                cached_content=glm.CachedContent(
+                    model=f"models/{self.model_name}",
+                    display_name="fiscal-agent-instructions",
+                    system_instruction=glm.Content(parts=[glm.Part(text=_render_instructions())]),
+                    ttl=duration_pb2.Duration(seconds=PROMPT_CACHE_TTL_SECONDS),
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Context caching unavailable, sending full prompt: {e}")
+            return None
+
+        self._refreshed_at = time.monotonic()
+        logger.info(f"Prompt prefix cached as {cache.name}")
+        return cache.name
+
+    def _refresh(self) -> None:
+        """Extend the cached context TTL, recreating it if that fails."""
+        try:
+            client = glm.CacheServiceClient(client_options={"api_key": self.api_key})
+            client.update_cached_content(
+                cached_content=glm.CachedContent(
+                    name=self.name,
+                    ttl=duration_pb2.Duration(seconds=PROMPT_CACHE_TTL_SECONDS),
+                ),
+                update_mask=field_mask_pb2.FieldMask(paths=["ttl"]),
+            )
+            self._refreshed_at = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Could not extend prompt cache, recreating: {e}")
+            self._set_name(self._create())
+
 
 class FiscalDocumentAgent:
     """
@@ -22,7 +204,15 @@ class FiscalDocumentAgent:
     and answering questions about fiscal documents.
     """
 
-    def __init__(self, api_key: str, model_name: str = "gemini-2.5-flash-lite", temperature: float = 0.3):
+    prompt_cache: Optional[PromptCache] = None
+
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str = "gemini-2.5-flash-lite",
+        temperature: float = 0.3,
+        use_context_cache: bool = True,
+    ):
         """
         Initialize the agent.
 
@@ -30,6 +220,7 @@ class FiscalDocumentAgent:
             api_key: Google Gemini API key
             model_name: Gemini model to use (default: gemini-2.5-flash-lite)
             temperature: Model temperature (0.0-1.0, lower = more deterministic)
+            use_context_cache: Cache the static prompt prefix on Gemini's side
         """
         self.api_key = api_key
         self.model_name = model_name
@@ -43,42 +234,24 @@ class FiscalDocumentAgent:
             convert_system_message_to_human=True,  # Gemini requires this
         )
 
-        # Initialize memory
-        self.memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True,
-            output_key="output",
+        # The static prompt prefix is registered as a Gemini cached context on
+        # the first call (see PromptCache); until then, or if caching fails,
+        # the prefix is rendered into every prompt as before. Forks share the
+        # cache together with the LLM client.
+        self.prompt_cache = (
+            PromptCache(self.llm, api_key, model_name) if use_context_cache else None
+        )
+        instructions = _render_instructions()
+        prompt_cache = self.prompt_cache
+        self.prompt = PromptTemplate(
+            template="{instructions}" + REACT_CONVERSATION,
+            input_variables=["chat_history", "input", "tool_names", "agent_scratchpad"],
+            partial_variables={
+                # {tools} is part of the instructions
+                "tools": "",
+                "instructions": lambda: "" if prompt_cache and prompt_cache.name else instructions,
+            },
         )
-
-        # Create prompt template with system prompt embedded
-        prompt_text = f"""
-{SYSTEM_PROMPT}
-
-FERRAMENTAS:
-{{tools}}
-
-FORMATO DE USO DAS FERRAMENTAS:
-Para usar uma ferramenta, use este formato EXATO:
-
-Thought: [seu raciocínio sobre o que fazer]
-Action: [nome da ferramenta]
-Action Input: [entrada para a ferramenta]
-Observation: [resultado da ferramenta]
-
-Quando tiver a resposta final:
-Thought: Tenho a resposta final
-Final Answer: [sua resposta ao usuário]
-
-HISTÓRICO DA CONVERSA:
-{{chat_history}}
-
-PERGUNTA DO USUÁRIO: {{input}}
-
-SEUS NOMES DE FERRAMENTAS: {{tool_names}}
-
-{{agent_scratchpad}}
-"""
-        self.prompt = PromptTemplate.from_template(prompt_text)
 
         # Create agent
         self.agent = create_react_agent(
@@ -87,19 +260,61 @@ SEUS NOMES DE FERRAMENTAS: {{tool_names}}
             prompt=self.prompt,
         )
 
+        # Per-conversation state: memory and the executor bound to it. The
+        # lock serializes turns: a streamed turn keeps running in its worker
+        # thread when the Streamlit run that started it is interrupted, and
+        # must not write memory concurrently with the next prompt.
+        self.memory, self.executor = self._new_conversation()
+        self._conversation_lock = threading.Lock()
+
+        logger.info(f"Agent initialized with model {model_name}")
+
+    def _prepare_prompt_cache(self) -> None:
+        """Create or extend the shared cached context before a turn."""
+        if self.prompt_cache:
+            self.prompt_cache.ensure()
+
+    def _new_conversation(self) -> tuple[ConversationBufferMemory, AgentExecutor]:
+        """
+        Create a fresh conversation memory and an executor bound to it.
+
+        Returns:
+            Tuple of (memory, executor)
+        """
+        memory = ConversationBufferMemory(
+            memory_key="chat_history",
+            return_messages=True,
+            output_key="output",
+        )
+
         # Create executor with better configuration for general questions
-        self.executor = AgentExecutor(
+        executor = AgentExecutor(
             agent=self.agent,
             tools=ALL_TOOLS,
-            memory=self.memory,
+            memory=memory,
             verbose=True,
             handle_parsing_errors=True,
             max_iterations=10,  # Increased to allow more tool usage
             early_stopping_method="generate",
             return_intermediate_steps=False,  # Cleaner output
         )
+        return memory, executor
 
-        logger.info(f"Agent initialized with model {model_name}")
+    def fork(self) -> "FiscalDocumentAgent":
+        """
+        Create an agent that shares the LLM client and ReAct runnable but
+        has its own conversation memory.
+
+        Used to hand each Streamlit session its own conversation while the
+        expensive LLM/agent construction is shared through ``st.cache_resource``.
+
+        Returns:
+            New FiscalDocumentAgent with empty memory
+        """
+        forked = copy.copy(self)
+        forked.memory, forked.executor = forked._new_conversation()
+        forked._conversation_lock = threading.Lock()
+        return forked
 
     def chat(self, message: str) -> str:
         """
@@ -113,9 +328,11 @@ SEUS NOMES DE FERRAMENTAS: {{tool_names}}
         """
         try:
             logger.info(f"Processing message: {message[:100]}...")
+            self._prepare_prompt_cache()
 
             # Pass only 'input' to avoid memory key conflict
-            response = self.executor.invoke({"input": message})
+            with self._conversation_lock:
+                response = self.executor.invoke({"input": message})
 
             output = response.get("output", "")
             logger.info(f"Response generated: {output[:100]}...")
@@ -125,7 +342,88 @@ SEUS NOMES DE FERRAMENTAS: {{tool_names}}
         except Exception as e:
             logger.error(f"Error in chat: {e}", exc_info=True)
             return f"❌ Desculpe, ocorreu um erro ao processar sua mensagem: {str(e)}"
-            return f"❌ Desculpe, ocorreu um erro ao processar sua mensagem: {str(e)}"
+
+    def stream(self, message: str) -> Iterator[str]:
+        """
+        Send a message to the agent and yield the final answer as it is generated.
+
+        The executor runs in a worker thread; tokens after "Final Answer:" are
+        yielded as they arrive, and any text the parser added or changed is
+        yielded at the end, so the concatenation matches chat()'s output.
+
+        Args:
+            message: User message
+
+        Yields:
+            Response text chunks
+        """
+        self._prepare_prompt_cache()
+        token_queue: queue.Queue = queue.Queue()
+        handler = FinalAnswerStreamHandler(token_queue)
+        result: dict = {}
+
+        def run() -> None:
+            try:
+                logger.info(f"Processing message (streaming): {message[:100]}...")
+                with self._conversation_lock:
+                    response = self.executor.invoke(
+                        {"input": message}, config={"callbacks": [handler]}
+                    )
+                result["output"] = response.get("output", "")
+                logger.info(f"Response generated: {result['output'][:100]}...")
+            except Exception as e:
+                logger.error(f"Error in chat: {e}", exc_info=True)
+                result["output"] = f"❌ Desculpe, ocorreu um erro ao processar sua mensagem: {str(e)}"
+            finally:
+                token_queue.put(None)
+
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+
+        streamed = ""
+        while (token := token_queue.get()) is not None:
+            streamed += token
+            yield token
+        worker.join()
+
+        # Yield whatever the streamed tokens did not cover
+        output = result.get("output", "")
+        prefix = streamed.strip()
+        if not streamed:
+            yield output
+        elif output.startswith(prefix) and len(output) > len(prefix):
+            remainder = output[len(prefix):]
+            yield remainder.lstrip() if streamed != streamed.rstrip() else remainder
+        elif not output.startswith(prefix):
+            logger.warning("Streamed answer diverged from final agent output")
+
+    def remember_exchange(self, message: str, response: str) -> None:
+        """
+        Record an exchange answered outside the executor (e.g. from cache).
+
+        Keeps the conversation memory consistent so follow-up questions
+        still see the cached turn.
+
+        Args:
+            message: User message
+            response: Response shown to the user
+        """
+        with self._conversation_lock:
+            self.memory.save_context({"input": message}, {"output": response})
+
+    def history_digest(self) -> str:
+        """
+        Hash the conversation held in memory, for keying cached responses.
+
+        Returns:
+            SHA-256 hex digest of the prior messages ("" when there are none)
+        """
+        with self._conversation_lock:
+            messages = self.memory.load_memory_variables({})["chat_history"]
+        if not messages:
+            return ""
+        payload = [(message.type, message.content) for message in messages]
+        return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode()).hexdigest()
 
     def reset_memory(self) -> None:
         """Clear conversation history."""
@@ -442,19 +442,13 @@ class ReportGeneratorTool(BaseTool):
                 limit=10000
             )
             
-            # Collect all issues
-            all_issues = []
-            for invoice in invoices:
-                # Filter by year if specified
-                if year and invoice.issue_date.year != year:
-                    continue
-                
-                try:
-                    # Get issues for this invoice
-                    issues = db.get_validation_issues(invoice.id)
-                    all_issues.extend(issues)
-                except Exception as e:
-                    logger.debug(f"No issues for invoice {invoice.id}: {e}")
+            # Collect all issues (filtered by year if specified) in one query
+            invoice_ids = [
+                invoice.id for invoice in invoices
+                if not year or invoice.issue_date.year == year
+            ]
+            issues_map = db.get_validation_issues_bulk(invoice_ids)
+            all_issues = [issue for issues in issues_map.values() for issue in issues]
             
             if not all_issues:
                 return f"📊 Nenhum problema de validação encontrado{f' em {year}' if year else ''}."
@@ -515,7 +509,7 @@ class ReportGeneratorTool(BaseTool):
 📊 **Análise de Problemas de Validação**
 
 📅 Período: {year if year else 'Todos os períodos'}
-📋 Total de problemas: {len(issues)}
+📋 Total de problemas: {len(all_issues)}
 
 **Distribuição por Severidade:**
 """
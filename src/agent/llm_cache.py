@@ -0,0 +1,174 @@
+"""
+Response cache for chat prompts.
+
+Repeated questions ("total por fornecedor", "quantas notas em outubro") are
+answered from the SQLite cache instead of another Gemini round-trip.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """
+    Two-tier cache for agent chat responses, persisted in the fiscal database.
+
+    Lookup order:
+    1. Exact tier: hash of the prompt exactly as typed
+    2. Normalized tier: hash of the prompt after case/whitespace/punctuation
+       folding, so trivially different phrasings share one entry
+
+    Both keys include a digest of the conversation that preceded the prompt,
+    so a follow-up only hits an entry stored after the same history.
+
+    Entries expire after ``ttl_seconds`` because answers depend on the
+    documents stored at the time they were generated.
+    """
+
+    # Very short prompts are usually follow-ups ("e em 2023?") whose meaning
+    # depends on the conversation, so they are never cached.
+    MIN_PROMPT_WORDS = 3
+
+    # Responses that must not be replayed: errors and one-shot download markers
+    UNCACHEABLE_MARKERS = ("❌", "DOWNLOAD_FILE:")
+
+    # Prompts relative to the current date ("notas de hoje") change meaning
+    # over time, so they are never cached.
+    TIME_SENSITIVE_PATTERN = re.compile(
+        r"\b(hoje|ontem|agora|atual|atualmente|este m[eê]s|esta semana|este ano|"
+        r"[uú]ltim[oa]s?|today|yesterday|now|current|this (?:month|week|year)|last)\b"
+    )
+
+    def __init__(self, database_manager: Any, ttl_seconds: int = 600):
+        """
+        Initialize the cache.
+
+        Args:
+            database_manager: DatabaseManager used to persist entries
+            ttl_seconds: Maximum age of a cached response
+        """
+        self.db = database_manager
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def cache_key(
+        model: str,
+        messages: Any,
+        temperature: float,
+        tools: Optional[list] = None,
+        history: str = "",
+    ) -> str:
+        """
+        Build a deterministic cache key.
+
+        Args:
+            model: Model name
+            messages: Prompt text or list of message dicts
+            temperature: Sampling temperature
+            tools: Optional list of tool names
+            history: Digest of the preceding conversation ("" for none)
+
+        Returns:
+            SHA-256 hex digest of the JSON-serialized payload
+        """
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "tools": tools,
+            "history": history,
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()
+        ).hexdigest()
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """Fold case, collapse whitespace and drop trailing punctuation."""
+        normalized = re.sub(r"\s+", " ", prompt.casefold()).strip()
+        return normalized.rstrip("?!.… ")
+
+    def is_cacheable_prompt(self, prompt: str) -> bool:
+        """Return True if the prompt is self-contained and not relative to the current date."""
+        normalized = self.normalize_prompt(prompt)
+        if len(normalized.split()) < self.MIN_PROMPT_WORDS:
+            return False
+        return not self.TIME_SENSITIVE_PATTERN.search(normalized)
+
+    def get(self, model: str, prompt: str, temperature: float, history: str = "") -> Optional[str]:
+        """
+        Look up a cached response (exact tier first, then normalized tier).
+
+        Args:
+            model: Model name
+            prompt: User prompt
+            temperature: Sampling temperature
+            history: Digest of the preceding conversation ("" for none)
+
+        Returns:
+            Cached response or None on miss
+        """
+        if not self.is_cacheable_prompt(prompt):
+            return None
+
+        for key in self._keys(model, prompt, temperature, history):
+            try:
+                response = self.db.get_llm_response_from_cache(key, self.ttl_seconds)
+            except (ValueError, RuntimeError, OSError) as e:
+                logger.warning(f"LLM cache lookup failed: {e}")
+                return None
+            if response is not None:
+                return response
+
+        return None
+
+    def set(
+        self, model: str, prompt: str, temperature: float, response: str, history: str = ""
+    ) -> None:
+        """
+        Store a response under both tiers.
+
+        Args:
+            model: Model name
+            prompt: User prompt
+            temperature: Sampling temperature
+            response: Agent response to cache
+            history: Digest of the preceding conversation ("" for none)
+        """
+        if not self.is_cacheable_prompt(prompt):
+            return
+        if not response or any(marker in response for marker in self.UNCACHEABLE_MARKERS):
+            return
+
+        for key in self._keys(model, prompt, temperature, history):
+            try:
+                self.db.save_llm_response_to_cache(key, prompt, response, model)
+            except (ValueError, RuntimeError, OSError) as e:
+                logger.warning(f"LLM cache save failed: {e}")
+                return
+
+    def clear(self) -> int:
+        """
+        Remove every cached response.
+
+        Returns:
+            Number of entries removed (0 if the database call failed)
+        """
+        try:
+            return self.db.clear_llm_response_cache()
+        except (ValueError, RuntimeError, OSError) as e:
+            logger.warning(f"LLM cache clear failed: {e}")
+            return 0
+
+    def _keys(self, model: str, prompt: str, temperature: float, history: str) -> list[str]:
+        """Return the exact and normalized keys for a prompt (deduplicated)."""
+        exact = self.cache_key(model, prompt, temperature, history=history)
+        normalized = self.cache_key(
+            model, self.normalize_prompt(prompt), temperature, history=history
+        )
+        return [exact] if exact == normalized else [exact, normalized]
@@ -15,6 +15,11 @@ from src.tools.xml_parser import XMLParserTool
 
 logger = logging.getLogger(__name__)
 
+# Display lookups used when formatting per-document tool output
+OPERATION_EMOJI = {"purchase": "📥", "sale": "📤", "transfer": "🔄", "return": "↩️"}
+OPERATION_LABEL = {"purchase": "Compra", "sale": "Venda", "transfer": "Transfer", "return": "Devolução"}
+SEVERITY_EMOJI = {"error": "🔴", "warning": "🟡"}
+
 
 class RobustBaseTool(BaseTool):
     """Custom BaseTool that handles JSON string inputs from LangChain agent."""
@@ -514,19 +519,8 @@ Para ver TODOS os documentos sem filtros, use days_back=9999 sem outros parâmet
             
             # Show first 15 documents
             for inv in invoices[:15]:
-                op_emoji = {
-                    "purchase": "📥",
-                    "sale": "📤",
-                    "transfer": "🔄",
-                    "return": "↩️"
-                }.get(inv.operation_type, "📄")
-                
-                op_label = {
-                    "purchase": "Compra",
-                    "sale": "Venda",
-                    "transfer": "Transfer",
-                    "return": "Devolução"
-                }.get(inv.operation_type, "N/A") if inv.operation_type else "N/A"
+                op_emoji = OPERATION_EMOJI.get(inv.operation_type, "📄")
+                op_label = OPERATION_LABEL.get(inv.operation_type, "N/A")
                 
                 result += f"""
 {op_emoji} **{inv.document_type}** - {inv.document_number}/{inv.series} | {op_label}
@@ -716,7 +710,7 @@ Isso significa que todos os documentos foram validados com sucesso! 🎉
 """
             
             for severity, count in sorted(analysis["by_severity"].items(), key=lambda x: x[1], reverse=True):
-                severity_emoji = "🔴" if severity == "error" else "🟡" if severity == "warning" else "ℹ️"
+                severity_emoji = SEVERITY_EMOJI.get(severity, "ℹ️")
                 result += f"\n- {severity_emoji} {severity.upper()}: {count} problema(s)"
             
             result += "\n\n**Top Problemas Mais Frequentes:**\n"
@@ -1,11 +1,12 @@
 """Database models and operations using SQLModel and SQLite."""
 
 import logging
+from collections import defaultdict
 from datetime import UTC, datetime, timedelta
 from decimal import Decimal
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import Index, create_engine, event, func, case, extract
+from sqlalchemy import Index, create_engine, delete, event, func, case, extract, tuple_
 from sqlalchemy import text
 from sqlalchemy.orm import selectinload
 from sqlmodel import Field, Relationship, Session, SQLModel, select
@@ -89,6 +90,8 @@ class InvoiceDB(SQLModel, table=True):
         Index('ix_invoices_cost_center_op', 'cost_center', 'operation_type'),
         # Transport: modal + period
         Index('ix_invoices_modal_date', 'modal', 'issue_date'),
+        # Statistics: count/sum per type without touching the table
+        Index('ix_invoices_type_total', 'document_type', 'total_invoice'),
     )
 
 
@@ -165,14 +168,54 @@ class ClassificationCacheDB(SQLModel, table=True):
     cfop: str = Field(index=True)
     
     # Usage stats
-    hit_count: int = Field(default=0)
+    hit_count: int = Field(default=0, index=True)
     last_used_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
     created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
 
 
+class LLMResponseCacheDB(SQLModel, table=True):
+    """Cache table for chat responses to avoid repeated LLM round-trips."""
+
+    __tablename__ = "llm_response_cache"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    
+    # Cache key (hash of model + temperature + normalized prompt)
+    cache_key: str = Field(unique=True, index=True)
+    
+    # Cached exchange
+    prompt: str
+    response: str
+    model_name: str
+    
+    # Usage stats
+    hit_count: int = Field(default=0)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC), index=True)
+
+
+class ChatMessageDB(SQLModel, table=True):
+    """Chat messages persisted per browser session so a reload keeps the conversation."""
+
+    __tablename__ = "chat_messages"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    # Stable session id (kept in the page URL)
+    session_id: str = Field(index=True)
+
+    role: str
+    content: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC), index=True)
+
+
 class DatabaseManager:
     """Manage SQLite database operations."""
 
+    # Persisted chat history: most recent messages kept per session, and the
+    # age after which messages of any session are dropped
+    CHAT_MESSAGES_PER_SESSION = 200
+    CHAT_RETENTION_DAYS = 30
+
     def __init__(self, database_url: str = "sqlite:///fiscal_documents.db"):
         """
         Initialize database manager.
@@ -183,6 +226,10 @@ class DatabaseManager:
         self.database_url = database_url
         self.engine = create_engine(database_url, echo=False)
         self.fts_enabled: bool = False
+        # Incremented on every committed invoice write (save, delete,
+        # reclassify); lets callers key caches on it. Cache and chat tables
+        # do not bump it, so chat turns leave those caches valid.
+        self.data_version: int = 0
         
         # Configure SQLite for better performance
         self._configure_sqlite_pragmas()
@@ -200,8 +247,8 @@ class DatabaseManager:
                 cursor.execute("PRAGMA journal_mode=WAL")
                 # Optimized synchronization (NORMAL is safe and faster)
                 cursor.execute("PRAGMA synchronous=NORMAL")
-                # Larger page cache (10MB)
-                cursor.execute("PRAGMA cache_size=-10000")
+                # Larger page cache (64MB) for the read-heavy UI aggregates
+                cursor.execute("PRAGMA cache_size=-65536")
                 # Enable foreign keys
                 cursor.execute("PRAGMA foreign_keys=ON")
                 # Temp store in memory
@@ -252,6 +299,9 @@ class DatabaseManager:
             ("ix_invoices_recipient_date", "invoices", "recipient_cnpj_cpf, issue_date"),
             ("ix_invoices_cost_center_op", "invoices", "cost_center, operation_type"),
             ("ix_invoices_modal_date", "invoices", "modal, issue_date"),
+            ("ix_invoices_type_total", "invoices", "document_type, total_invoice"),
+            ("ix_classification_cache_hit_count", "classification_cache", "hit_count"),
+            ("ix_chat_messages_created_at", "chat_messages", "created_at"),
         ]
 
         with self.engine.begin() as conn:
@@ -454,6 +504,7 @@ class DatabaseManager:
                 session.add(issue_db)
             
             session.commit()
+            self.data_version += 1
             logger.info(f"Saved invoice {invoice_db.document_key} with {len(invoice_model.items)} items")
             
             # Eagerly load relationships before session closes
@@ -620,17 +671,22 @@ class DatabaseManager:
             return []
         
         saved_invoices = []
+        new_ids = []
+        fts_rows = []
         
         with Session(self.engine) as session:
+            # One lookup for every key in the batch instead of one per invoice
+            keys = [invoice_model.document_key for invoice_model, _, _ in invoices_data]
+            by_key = {
+                inv.document_key: inv
+                for inv in session.exec(select(InvoiceDB).where(InvoiceDB.document_key.in_(keys)))
+            }
+            
             # Single transaction for all inserts
             for invoice_model, validation_issues, classification in invoices_data:
-                # Check if already exists (skip duplicates)
-                statement = select(InvoiceDB).where(
-                    InvoiceDB.document_key == invoice_model.document_key
-                )
-                existing = session.exec(statement).first()
-                
-                if existing:
+                # Skip duplicates (already stored, or repeated within the batch)
+                existing = by_key.get(invoice_model.document_key)
+                if existing is not None:
                     logger.warning(f"Skipping duplicate: {invoice_model.document_key}")
                     saved_invoices.append(existing)
                     continue
@@ -639,6 +695,8 @@ class DatabaseManager:
                 invoice_db = self._create_invoice_db(invoice_model, classification)
                 session.add(invoice_db)
                 session.flush()  # Get invoice.id without committing
+                by_key[invoice_db.document_key] = invoice_db
+                new_ids.append(invoice_db.id)
                 
                 # Create items
                 item_dbs = self._create_item_dbs(invoice_db, invoice_model.items)
@@ -650,32 +708,50 @@ class DatabaseManager:
                 for issue_db in issue_dbs:
                     session.add(issue_db)
                 
+                if self.fts_enabled:
+                    fts_rows.append({
+                        "iid": invoice_db.id,
+                        "inm": invoice_db.issuer_name or "",
+                        "rnm": invoice_db.recipient_name or "",
+                        "it": " ".join(it.description or "" for it in invoice_model.items)[:20000],
+                    })
+                
                 saved_invoices.append(invoice_db)
             
+            # FTS rows for the new invoices go into the same transaction
+            # (only new ones, so duplicates are not indexed twice)
+            if fts_rows:
+                try:
+                    session.exec(
+                        text(
+                            "INSERT INTO invoices_fts (invoice_id, issuer_name, recipient_name, items_text) VALUES (:iid, :inm, :rnm, :it)"
+                        ),
+                        params=fts_rows,
+                    )
+                except Exception as e:
+                    logger.debug(f"FTS batch update skipped: {e}")
+            
             # Single commit for entire batch
             session.commit()
+            if new_ids:
+                self.data_version += 1
+            
+            # Load relationships for all returned invoices in one pass
+            # (replaces a refresh per invoice)
+            returned_ids = [inv.id for inv in saved_invoices]
+            loaded = {
+                inv.id: inv
+                for inv in session.exec(
+                    select(InvoiceDB)
+                    .options(selectinload(InvoiceDB.items), selectinload(InvoiceDB.issues))
+                    .where(InvoiceDB.id.in_(returned_ids))
+                    .execution_options(populate_existing=True)
+                )
+            }
+            saved_invoices = [loaded[invoice_id] for invoice_id in returned_ids]
             
-            logger.info(f"Bulk inserted {len(saved_invoices)} invoices "
-                       f"({sum(len(inv.items) for inv in saved_invoices)} items total)")
-            
-            # Refresh all to load relationships
-            for invoice_db in saved_invoices:
-                session.refresh(invoice_db, ["items", "issues"])
-            
-            # Batch update FTS
-            try:
-                if self.fts_enabled and saved_invoices:
-                    for inv in saved_invoices:
-                        items_text = " ".join([it.description or "" for it in inv.items])[:20000]
-                        session.exec(
-                            text(
-                                "INSERT INTO invoices_fts (invoice_id, issuer_name, recipient_name, items_text) VALUES (:iid, :inm, :rnm, :it)"
-                            ),
-                            {"iid": inv.id, "inm": inv.issuer_name or "", "rnm": inv.recipient_name or "", "it": items_text},
-                        )
-                    session.commit()
-            except Exception as e:
-                logger.debug(f"FTS batch update skipped: {e}")
+            logger.info(f"Bulk inserted {len(new_ids)} invoices "
+                       f"({sum(len(loaded[invoice_id].items) for invoice_id in new_ids)} items total)")
         
         return saved_invoices
 
@@ -713,6 +789,106 @@ class DatabaseManager:
                 _ = inv.issues
             return invoices
 
+    def _invoice_filter_conditions(
+        self,
+        session: Session,
+        document_type: Optional[str] = None,
+        invoice_type: Optional[str] = None,
+        operation_type: Optional[str] = None,
+        issuer_cnpj: Optional[str] = None,
+        recipient_cnpj: Optional[str] = None,
+        modal: Optional[str] = None,
+        cost_center: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        days_back: Optional[int] = None,
+        q: Optional[str] = None,
+    ) -> Optional[list]:
+        """
+        Build WHERE conditions shared by the invoice search/count queries.
+
+        Returns:
+            List of SQLAlchemy conditions, or None if the full-text search
+            matched nothing (callers can skip the main query)
+        """
+        conditions = []
+        
+        # Full-text search
+        if q:
+            like_condition = (InvoiceDB.issuer_name.contains(q)) | (InvoiceDB.recipient_name.contains(q))
+            if self.fts_enabled:
+                try:
+                    # Fetch matching IDs via FTS
+                    id_rows = session.exec(
+                        text("SELECT invoice_id FROM invoices_fts WHERE invoices_fts MATCH :q"),
+                        {"q": q},
+                    ).all()
+                    ids = [row[0] for row in id_rows]
+                    if not ids:
+                        return None
+                    conditions.append(InvoiceDB.id.in_(ids))
+                except Exception as e:
+                    logger.debug(f"FTS query failed, fallback to LIKE: {e}")
+                    conditions.append(like_condition)
+            else:
+                conditions.append(like_condition)
+
+        # Handle both document_type and invoice_type (alias)
+        doc_type = document_type or invoice_type
+        if doc_type:
+            conditions.append(InvoiceDB.document_type == doc_type)
+        
+        # Operation type filter
+        if operation_type:
+            conditions.append(InvoiceDB.operation_type == operation_type)
+        
+        # CNPJ contains search
+        if issuer_cnpj:
+            conditions.append(InvoiceDB.issuer_cnpj.contains(issuer_cnpj))
+        if recipient_cnpj:
+            conditions.append(InvoiceDB.recipient_cnpj_cpf.contains(recipient_cnpj))
+
+        # Transport modal filter (exact match)
+        if modal:
+            conditions.append(InvoiceDB.modal == modal)
+
+        # Cost center and confidence filters
+        if cost_center:
+            conditions.append(InvoiceDB.cost_center == cost_center)
+        if min_confidence is not None:
+            conditions.append(InvoiceDB.classification_confidence >= min_confidence)
+        
+        # Date filters
+        if days_back:
+            cutoff_date = datetime.now(UTC) - timedelta(days=days_back)
+            conditions.append(InvoiceDB.issue_date >= cutoff_date)
+        if start_date:
+            conditions.append(InvoiceDB.issue_date >= start_date)
+        if end_date:
+            conditions.append(InvoiceDB.issue_date <= end_date)
+        
+        return conditions
+
+    @staticmethod
+    def _paginate(statement, limit: int, offset: int, after_key: Optional[Tuple[datetime, int]]):
+        """Apply keyset cursor, (issue_date, id) descending order, offset and limit."""
+        # Keyset pagination: seek past the previous page's last row.
+        # (issue_date, id) is served by ix_invoices_issue_date, since SQLite
+        # secondary indexes end with the rowid (id).
+        if after_key is not None:
+            statement = statement.where(
+                tuple_(InvoiceDB.issue_date, InvoiceDB.id) < tuple_(*after_key)
+            )
+        
+        # Order by date descending (id breaks ties) and apply pagination
+        return (
+            statement
+            .order_by(InvoiceDB.issue_date.desc(), InvoiceDB.id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+
     def search_invoices(
         self,
         document_type: Optional[str] = None,
@@ -729,6 +905,8 @@ class DatabaseManager:
         limit: int = 100,
         offset: int = 0,
         q: Optional[str] = None,
+        after_key: Optional[Tuple[datetime, int]] = None,
+        load_issues: bool = True,
     ) -> List[InvoiceDB]:
         """
         Search invoices with filters.
@@ -747,93 +925,130 @@ class DatabaseManager:
             days_back: Filter by documents from last N days
             limit: Maximum results
             offset: Skip first N results (for pagination)
+            after_key: Keyset cursor ``(issue_date, id)`` of the last row of the
+                previous page; only rows after it are returned. Unlike offset,
+                the cost does not grow with page depth.
+            load_issues: Eager-load validation issues (items are always loaded);
+                pass False when only invoice/item data is displayed
 
         Returns:
             List of matching invoices with eagerly loaded relationships
         """
-        from sqlalchemy.orm import selectinload
-        
         with Session(self.engine) as session:
-            statement = select(InvoiceDB).options(
-                selectinload(InvoiceDB.items),
-                selectinload(InvoiceDB.issues)
+            conditions = self._invoice_filter_conditions(
+                session,
+                document_type=document_type,
+                invoice_type=invoice_type,
+                operation_type=operation_type,
+                issuer_cnpj=issuer_cnpj,
+                recipient_cnpj=recipient_cnpj,
+                modal=modal,
+                cost_center=cost_center,
+                min_confidence=min_confidence,
+                start_date=start_date,
+                end_date=end_date,
+                days_back=days_back,
+                q=q,
             )
+            if conditions is None:
+                return []
             
-            # Full-text search
-            if q:
-                if self.fts_enabled:
-                    try:
-                        # Fetch matching IDs via FTS
-                        id_rows = session.exec(
-                            text("SELECT invoice_id FROM invoices_fts WHERE invoices_fts MATCH :q"),
-                            {"q": q},
-                        ).all()
-                        ids = [row[0] for row in id_rows]
-                        if not ids:
-                            return []
-                        statement = statement.where(InvoiceDB.id.in_(ids))
-                    except Exception as e:
-                        logger.debug(f"FTS query failed, fallback to LIKE: {e}")
-                        statement = statement.where(
-                            (InvoiceDB.issuer_name.contains(q)) | (InvoiceDB.recipient_name.contains(q))
-                        )
-                else:
-                    statement = statement.where(
-                        (InvoiceDB.issuer_name.contains(q)) | (InvoiceDB.recipient_name.contains(q))
-                    )
+            statement = select(InvoiceDB).options(selectinload(InvoiceDB.items))
+            if load_issues:
+                statement = statement.options(selectinload(InvoiceDB.issues))
+            statement = self._paginate(statement.where(*conditions), limit, offset, after_key)
+            
+            return list(session.exec(statement).all())
 
-            # Handle both document_type and invoice_type (alias)
-            doc_type = document_type or invoice_type
-            if doc_type:
-                statement = statement.where(InvoiceDB.document_type == doc_type)
-            
-            # Operation type filter
-            if operation_type:
-                statement = statement.where(InvoiceDB.operation_type == operation_type)
-            
-            # CNPJ contains search
-            if issuer_cnpj:
-                statement = statement.where(InvoiceDB.issuer_cnpj.contains(issuer_cnpj))
-            if recipient_cnpj:
-                statement = statement.where(InvoiceDB.recipient_cnpj_cpf.contains(recipient_cnpj))
-
-            # Transport modal filter (exact match)
-            if modal:
-                statement = statement.where(InvoiceDB.modal == modal)
-
-            # Cost center and confidence filters
-            if cost_center:
-                statement = statement.where(InvoiceDB.cost_center == cost_center)
-            if min_confidence is not None:
-                statement = statement.where(InvoiceDB.classification_confidence >= min_confidence)
-            
-            # Date filters
-            if days_back:
-                cutoff_date = datetime.now(UTC) - timedelta(days=days_back)
-                statement = statement.where(InvoiceDB.issue_date >= cutoff_date)
-            if start_date:
-                statement = statement.where(InvoiceDB.issue_date >= start_date)
-            if end_date:
-                statement = statement.where(InvoiceDB.issue_date <= end_date)
-            
-            # Order by date descending and apply pagination
-            statement = (
-                statement
-                .order_by(InvoiceDB.issue_date.desc())
-                .offset(offset)
-                .limit(limit)
-            )
+    def search_invoices_summary(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        after_key: Optional[Tuple[datetime, int]] = None,
+        **filters,
+    ) -> list:
+        """
+        Search invoices returning only the columns shown in list views.
+
+        Items are not loaded; their count comes from a correlated COUNT
+        subquery on the indexed invoice_items.invoice_id.
+
+        Args:
+            limit: Maximum results
+            offset: Skip first N results
+            after_key: Keyset cursor, as in search_invoices()
+            **filters: Same filters as search_invoices()
+
+        Returns:
+            List of rows with attribute access (id, issue_date, document_type,
+            operation_type, document_number, issuer_name, issuer_cnpj,
+            recipient_name, recipient_cnpj_cpf, modal, cost_center,
+            classification_confidence, total_invoice, document_key, items_count)
+        """
+        items_count = (
+            select(func.count(InvoiceItemDB.id))
+            .where(InvoiceItemDB.invoice_id == InvoiceDB.id)
+            .correlate(InvoiceDB)
+            .scalar_subquery()
+            .label("items_count")
+        )
+        
+        with Session(self.engine) as session:
+            conditions = self._invoice_filter_conditions(session, **filters)
+            if conditions is None:
+                return []
             
-            # Execute query and get all results
-            invoices = list(session.exec(statement).all())
+            statement = select(
+                InvoiceDB.id,
+                InvoiceDB.issue_date,
+                InvoiceDB.document_type,
+                InvoiceDB.operation_type,
+                InvoiceDB.document_number,
+                InvoiceDB.issuer_name,
+                InvoiceDB.issuer_cnpj,
+                InvoiceDB.recipient_name,
+                InvoiceDB.recipient_cnpj_cpf,
+                InvoiceDB.modal,
+                InvoiceDB.cost_center,
+                InvoiceDB.classification_confidence,
+                InvoiceDB.total_invoice,
+                InvoiceDB.document_key,
+                items_count,
+            ).where(*conditions)
+            statement = self._paginate(statement, limit, offset, after_key)
             
-            # Ensure relationships are loaded before session closes
-            for inv in invoices:
-                # Access relationships to ensure they're loaded
-                _ = inv.items
-                _ = inv.issues
+            return list(session.exec(statement).all())
+
+    def get_page_boundary_key(
+        self, page_size: int, page: int, **filters
+    ) -> Optional[Tuple[datetime, int]]:
+        """
+        Find the keyset cursor that starts a page, for direct page jumps.
+
+        Only (issue_date, id) is selected, so without filters the OFFSET
+        walk stays inside ix_invoices_issue_date instead of reading rows.
+
+        Args:
+            page_size: Rows per page
+            page: 1-based page number
+            **filters: Same filters as search_invoices()
+
+        Returns:
+            ``(issue_date, id)`` of the last row before the page, or None
+            for the first page or a page past the end
+        """
+        if page <= 1:
+            return None
+        
+        with Session(self.engine) as session:
+            conditions = self._invoice_filter_conditions(session, **filters)
+            if conditions is None:
+                return None
             
-            return invoices
+            statement = select(InvoiceDB.issue_date, InvoiceDB.id).where(*conditions)
+            statement = self._paginate(statement, 1, (page - 1) * page_size - 1, None)
+            row = session.exec(statement).first()
+            return (row.issue_date, row.id) if row else None
 
     def count_invoices(
         self,
@@ -852,59 +1067,25 @@ class DatabaseManager:
     ) -> int:
         """Return total count for given filters (used for pagination)."""
         with Session(self.engine) as session:
-            statement = select(func.count()).select_from(InvoiceDB)
-
-            # Handle both document_type and invoice_type (alias)
-            doc_type = document_type or invoice_type
-            if doc_type:
-                statement = statement.where(InvoiceDB.document_type == doc_type)
-
-            if operation_type:
-                statement = statement.where(InvoiceDB.operation_type == operation_type)
-
-            if issuer_cnpj:
-                statement = statement.where(InvoiceDB.issuer_cnpj.contains(issuer_cnpj))
-            if recipient_cnpj:
-                statement = statement.where(InvoiceDB.recipient_cnpj_cpf.contains(recipient_cnpj))
-
-            if modal:
-                statement = statement.where(InvoiceDB.modal == modal)
-
-            if cost_center:
-                statement = statement.where(InvoiceDB.cost_center == cost_center)
-            if min_confidence is not None:
-                statement = statement.where(InvoiceDB.classification_confidence >= min_confidence)
-
-            if days_back:
-                cutoff_date = datetime.now(UTC) - timedelta(days=days_back)
-                statement = statement.where(InvoiceDB.issue_date >= cutoff_date)
-            if start_date:
-                statement = statement.where(InvoiceDB.issue_date >= start_date)
-            if end_date:
-                statement = statement.where(InvoiceDB.issue_date <= end_date)
-
-            # FTS or LIKE for text search
-            if q:
-                if self.fts_enabled:
-                    try:
-                        id_rows = session.exec(
-                            text("SELECT invoice_id FROM invoices_fts WHERE invoices_fts MATCH :q"),
-                            {"q": q},
-                        ).all()
-                        ids = [row[0] for row in id_rows]
-                        if not ids:
-                            return 0
-                        statement = statement.where(InvoiceDB.id.in_(ids))
-                    except Exception as e:
-                        logger.debug(f"FTS count failed, fallback to LIKE: {e}")
-                        statement = statement.where(
-                            (InvoiceDB.issuer_name.contains(q)) | (InvoiceDB.recipient_name.contains(q))
-                        )
-                else:
-                    statement = statement.where(
-                        (InvoiceDB.issuer_name.contains(q)) | (InvoiceDB.recipient_name.contains(q))
-                    )
-
+            conditions = self._invoice_filter_conditions(
+                session,
+                document_type=document_type,
+                invoice_type=invoice_type,
+                operation_type=operation_type,
+                issuer_cnpj=issuer_cnpj,
+                recipient_cnpj=recipient_cnpj,
+                modal=modal,
+                cost_center=cost_center,
+                min_confidence=min_confidence,
+                start_date=start_date,
+                end_date=end_date,
+                days_back=days_back,
+                q=q,
+            )
+            if conditions is None:
+                return 0
+            
+            statement = select(func.count()).select_from(InvoiceDB).where(*conditions)
             return session.exec(statement).one()
 
     def get_statistics(self, year: Optional[int] = None, month: Optional[int] = None) -> dict:
@@ -912,7 +1093,7 @@ class DatabaseManager:
         from datetime import datetime as dt_module
         
         with Session(self.engine) as session:
-            query = select(InvoiceDB)
+            conditions = []
             
             # Apply year/month filters if provided
             if year:
@@ -927,47 +1108,41 @@ class DatabaseManager:
                     # For whole year
                     end_date = dt_module(year + 1, 1, 1)
                 
-                query = query.where(
-                    (InvoiceDB.issue_date >= start_date) &
-                    (InvoiceDB.issue_date < end_date)
-                )
+                conditions = [InvoiceDB.issue_date >= start_date, InvoiceDB.issue_date < end_date]
             
-            invoices = session.exec(query).all()
-            total_invoices = len(invoices)
-            
-            # Get items for these invoices
-            if invoices:
-                invoice_ids = [inv.id for inv in invoices]
-                items_query = select(InvoiceItemDB).where(InvoiceItemDB.invoice_id.in_(invoice_ids))
-                items = session.exec(items_query).all()
-            else:
-                items = []
+            # Counts and totals by document type in a single GROUP BY
+            # (served by the ix_invoices_type_total covering index)
+            type_query = select(
+                InvoiceDB.document_type,
+                func.count(InvoiceDB.id),
+                func.coalesce(func.sum(InvoiceDB.total_invoice), 0),
+            ).where(*conditions).group_by(InvoiceDB.document_type)
             
-            total_items = len(items)
-            
-            # Get issues for these invoices
-            if invoices:
-                invoice_ids = [inv.id for inv in invoices]
-                issues_query = select(ValidationIssueDB).where(ValidationIssueDB.invoice_id.in_(invoice_ids))
-                issues = session.exec(issues_query).all()
-            else:
-                issues = []
-            
-            total_issues = len(issues)
-            
-            # Get totals by document type
             by_type = {}
+            total_invoices = 0
             total_value = Decimal("0")
+            for document_type, count, value in session.exec(type_query).all():
+                by_type[document_type] = count
+                total_invoices += count
+                total_value += Decimal(str(value))
             
-            for inv in invoices:
-                by_type[inv.document_type] = by_type.get(inv.document_type, 0) + 1
-                total_value += inv.total_invoice
+            # Item and issue counts, joined to invoices only when filtering by period
+            items_query = select(func.count(InvoiceItemDB.id))
+            issues_query = select(func.count(ValidationIssueDB.id))
+            if conditions:
+                items_query = items_query.join(InvoiceDB).where(*conditions)
+                issues_query = issues_query.join(InvoiceDB).where(*conditions)
+            
+            total_items = session.exec(items_query).one()
+            total_issues = session.exec(issues_query).one()
             
             return {
                 "total_invoices": total_invoices,
                 "total_items": total_items,
                 "total_issues": total_issues,
                 "by_type": by_type,
+                # Same data as hashable (type, count) pairs, e.g. for cached charts
+                "by_type_items": tuple(by_type.items()),
                 "total_value": float(total_value),
             }
 
@@ -981,6 +1156,7 @@ class DatabaseManager:
             if invoice:
                 session.delete(invoice)
                 session.commit()
+                self.data_version += 1
                 logger.info(f"Deleted invoice {document_key}")
                 return True
             
@@ -994,6 +1170,29 @@ class DatabaseManager:
             )
             return list(session.exec(statement).all())
 
+    def get_validation_issues_bulk(self, invoice_ids: List[int]) -> Dict[int, List[ValidationIssueDB]]:
+        """
+        Get validation issues for many invoices in a single query.
+
+        Args:
+            invoice_ids: Invoice IDs to load issues for
+
+        Returns:
+            Dict mapping invoice_id to its issues (invoices without issues are absent)
+        """
+        if not invoice_ids:
+            return {}
+        
+        issues_map: Dict[int, List[ValidationIssueDB]] = defaultdict(list)
+        
+        with Session(self.engine) as session:
+            statement = select(ValidationIssueDB).where(
+                ValidationIssueDB.invoice_id.in_(invoice_ids)
+            )
+            for issue in session.exec(statement).all():
+                issues_map[issue.invoice_id].append(issue)
+        return dict(issues_map)
+
     def get_classification_from_cache(self, cache_key: str) -> Optional[dict]:
         """Get classification from cache."""
         with Session(self.engine) as session:
@@ -1068,7 +1267,12 @@ class DatabaseManager:
     def get_cache_statistics(self) -> dict:
         """Get cache statistics."""
         with Session(self.engine) as session:
-            total_entries = len(session.exec(select(ClassificationCacheDB)).all())
+            total_entries, total_hits = session.exec(
+                select(
+                    func.count(ClassificationCacheDB.id),
+                    func.coalesce(func.sum(ClassificationCacheDB.hit_count), 0),
+                )
+            ).one()
             
             if total_entries == 0:
                 return {
@@ -1078,16 +1282,147 @@ class DatabaseManager:
                     "cache_effectiveness": 0,
                 }
             
-            cache_entries = session.exec(select(ClassificationCacheDB)).all()
-            total_hits = sum(entry.hit_count for entry in cache_entries)
-            
             return {
                 "total_entries": total_entries,
                 "total_hits": total_hits,
-                "avg_hits_per_entry": total_hits / total_entries if total_entries > 0 else 0,
-                "cache_effectiveness": (total_hits / (total_entries + total_hits)) * 100 if (total_entries + total_hits) > 0 else 0,
+                "avg_hits_per_entry": total_hits / total_entries,
+                "cache_effectiveness": (total_hits / (total_entries + total_hits)) * 100,
             }
 
+    def get_llm_response_from_cache(self, cache_key: str, max_age_seconds: int) -> Optional[str]:
+        """Get a cached chat response if it is younger than max_age_seconds."""
+        cutoff = datetime.now(UTC) - timedelta(seconds=max_age_seconds)
+        with Session(self.engine) as session:
+            statement = select(LLMResponseCacheDB).where(
+                LLMResponseCacheDB.cache_key == cache_key,
+                LLMResponseCacheDB.created_at >= cutoff,
+            )
+            cache_entry = session.exec(statement).first()
+            
+            if cache_entry:
+                cache_entry.hit_count += 1
+                session.add(cache_entry)
+                session.commit()
+                
+                logger.info(f"LLM cache HIT for key {cache_key[:16]}... (hits: {cache_entry.hit_count})")
+                return cache_entry.response
+            
+            return None
+
+    def save_llm_response_to_cache(
+        self,
+        cache_key: str,
+        prompt: str,
+        response: str,
+        model_name: str,
+    ) -> None:
+        """Save (or refresh) a chat response in the cache."""
+        with Session(self.engine) as session:
+            statement = select(LLMResponseCacheDB).where(
+                LLMResponseCacheDB.cache_key == cache_key
+            )
+            existing = session.exec(statement).first()
+            
+            if existing:
+                existing.prompt = prompt
+                existing.response = response
+                existing.model_name = model_name
+                existing.created_at = datetime.now(UTC)
+                session.add(existing)
+            else:
+                session.add(
+                    LLMResponseCacheDB(
+                        cache_key=cache_key,
+                        prompt=prompt,
+                        response=response,
+                        model_name=model_name,
+                    )
+                )
+            
+            session.commit()
+            logger.info(f"Saved chat response to cache: {cache_key[:16]}...")
+
+    def clear_llm_response_cache(self) -> int:
+        """Delete all cached chat responses and return how many were removed."""
+        with Session(self.engine) as session:
+            deleted = session.exec(delete(LLMResponseCacheDB)).rowcount
+            session.commit()
+            logger.info(f"Cleared {deleted} cached chat responses")
+            return deleted
+
+    def save_chat_messages(self, session_id: str, messages: List[Dict]) -> None:
+        """
+        Append chat messages to a session's history in one transaction.
+
+        The same transaction prunes the history: the session keeps only its
+        latest CHAT_MESSAGES_PER_SESSION messages, and messages older than
+        CHAT_RETENTION_DAYS are removed for every session.
+
+        Args:
+            session_id: Chat session id
+            messages: Message dicts with "role" and "content"
+        """
+        cutoff = datetime.now(UTC) - timedelta(days=self.CHAT_RETENTION_DAYS)
+        with Session(self.engine) as session:
+            session.add_all(
+                ChatMessageDB(session_id=session_id, role=m["role"], content=m["content"])
+                for m in messages
+            )
+            session.flush()
+
+            # id of the oldest message still within the per-session cap
+            oldest_kept = session.exec(
+                select(ChatMessageDB.id)
+                .where(ChatMessageDB.session_id == session_id)
+                .order_by(ChatMessageDB.id.desc())
+                .offset(self.CHAT_MESSAGES_PER_SESSION - 1)
+                .limit(1)
+            ).first()
+            if oldest_kept is not None:
+                session.exec(
+                    delete(ChatMessageDB).where(
+                        ChatMessageDB.session_id == session_id,
+                        ChatMessageDB.id < oldest_kept,
+                    )
+                )
+            session.exec(delete(ChatMessageDB).where(ChatMessageDB.created_at < cutoff))
+            session.commit()
+
+    def delete_chat_messages(self, session_id: str) -> int:
+        """
+        Delete a session's chat history.
+
+        Args:
+            session_id: Chat session id
+
+        Returns:
+            Number of messages removed
+        """
+        with Session(self.engine) as session:
+            deleted = session.exec(
+                delete(ChatMessageDB).where(ChatMessageDB.session_id == session_id)
+            ).rowcount
+            session.commit()
+            return deleted
+
+    def get_chat_messages(self, session_id: str) -> List[Dict]:
+        """
+        Load a session's chat history in the order it was written.
+
+        Args:
+            session_id: Chat session id
+
+        Returns:
+            List of message dicts with "role" and "content"
+        """
+        with Session(self.engine) as session:
+            rows = session.exec(
+                select(ChatMessageDB.role, ChatMessageDB.content)
+                .where(ChatMessageDB.session_id == session_id)
+                .order_by(ChatMessageDB.id)
+            ).all()
+            return [{"role": role, "content": content} for role, content in rows]
+
     def update_invoice_classification(
         self,
         document_key: str,
@@ -1107,6 +1442,7 @@ class DatabaseManager:
                 
                 session.add(invoice)
                 session.commit()
+                self.data_version += 1
                 logger.info(f"Updated classification for invoice {document_key}")
                 return True
             
@@ -1689,7 +2025,12 @@ class DatabaseManager:
             
             with Session(self.engine) as session:
                 # Get invoices in the period with their validation issues
-                query = select(InvoiceDB).where(InvoiceDB.issue_date >= start_date)
+                # (selectinload: one IN query instead of one query per invoice)
+                query = (
+                    select(InvoiceDB)
+                    .options(selectinload(InvoiceDB.issues))
+                    .where(InvoiceDB.issue_date >= start_date)
+                )
                 invoices = session.exec(query).all()
                 
                 # Aggregate by month
@@ -1712,12 +2053,7 @@ class DatabaseManager:
                     monthly_data[period_key]["document_count"] += 1
                     
                     # Count issues for this invoice
-                    issue_query = select(ValidationIssueDB).where(
-                        ValidationIssueDB.invoice_id == invoice.id
-                    )
-                    issues = session.exec(issue_query).all()
-                    
-                    for issue in issues:
+                    for issue in invoice.issues:
                         if issue.severity == "error":
                             monthly_data[period_key]["error_count"] += 1
                         elif issue.severity == "warning":
@@ -1,6 +1,9 @@
 """External API validators for fiscal document validation."""
 
 import logging
+import ssl
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from functools import lru_cache
@@ -11,6 +14,17 @@ import httpx
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def shared_ssl_context() -> ssl.SSLContext:
+    """
+    SSL context shared by all validator requests.
+
+    Loading the CA bundle is the expensive part of creating an HTTP client
+    (tens of ms of CPU), so it is done once instead of once per lookup.
+    """
+    return httpx.create_ssl_context()
+
+
 @dataclass
 class CNPJData:
     """CNPJ data from external API."""
@@ -50,6 +64,9 @@ class CNPJValidator:
     
     BASE_URL = "https://brasilapi.com.br/api/cnpj/v1"
     CACHE_TTL = timedelta(hours=24)
+    # The shared validator lives as long as the server process, so the
+    # cache is an LRU bounded to this many CNPJs
+    CACHE_MAX_ENTRIES = 5000
     
     def __init__(self, timeout: float = 10.0):
         """
@@ -59,21 +76,35 @@ class CNPJValidator:
             timeout: HTTP request timeout in seconds
         """
         self.timeout = timeout
-        self._cache = {}
-        self._cache_timestamps = {}
+        # CNPJ -> (data, fetched_at), least recently used first
+        self._cache: OrderedDict[str, tuple[CNPJData, datetime]] = OrderedDict()
+        self._cache_lock = threading.Lock()
     
     @lru_cache(maxsize=500)
     def _format_cnpj(self, cnpj: str) -> str:
         """Format CNPJ to digits only."""
         return cnpj.replace(".", "").replace("/", "").replace("-", "").strip()
     
-    def _is_cache_valid(self, cnpj: str) -> bool:
-        """Check if cached data is still valid."""
-        if cnpj not in self._cache_timestamps:
-            return False
-        
-        age = datetime.now() - self._cache_timestamps[cnpj]
-        return age < self.CACHE_TTL
+    def _get_cached(self, cnpj: str) -> Optional[CNPJData]:
+        """Return cached data younger than CACHE_TTL (expired entries are dropped)."""
+        with self._cache_lock:
+            entry = self._cache.get(cnpj)
+            if entry is None:
+                return None
+            cnpj_data, fetched_at = entry
+            if datetime.now() - fetched_at >= self.CACHE_TTL:
+                del self._cache[cnpj]
+                return None
+            self._cache.move_to_end(cnpj)
+            return cnpj_data
+
+    def _store_cached(self, cnpj: str, cnpj_data: CNPJData) -> None:
+        """Cache data for a CNPJ, evicting the least recently used entries."""
+        with self._cache_lock:
+            self._cache[cnpj] = (cnpj_data, datetime.now())
+            self._cache.move_to_end(cnpj)
+            while len(self._cache) > self.CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
     
     async def validate_cnpj_async(self, cnpj: str) -> Optional[CNPJData]:
         """
@@ -88,14 +119,15 @@ class CNPJValidator:
         cnpj_clean = self._format_cnpj(cnpj)
         
         # Check cache
-        if self._is_cache_valid(cnpj_clean):
+        cached = self._get_cached(cnpj_clean)
+        if cached is not None:
             logger.info(f"Using cached CNPJ data for {cnpj_clean}")
-            return self._cache[cnpj_clean]
+            return cached
         
         url = f"{self.BASE_URL}/{cnpj_clean}"
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with httpx.AsyncClient(verify=shared_ssl_context()) as client:
                 response = await client.get(url, timeout=self.timeout)
                 
                 if response.status_code == 200:
@@ -103,8 +135,7 @@ class CNPJValidator:
                     cnpj_data = self._parse_response(data)
                     
                     # Cache result
-                    self._cache[cnpj_clean] = cnpj_data
-                    self._cache_timestamps[cnpj_clean] = datetime.now()
+                    self._store_cached(cnpj_clean, cnpj_data)
                     
                     logger.info(f"CNPJ {cnpj_clean} validated: {cnpj_data.situacao}")
                     return cnpj_data
@@ -276,6 +307,25 @@ class CNPJValidator:
         return cnpj_data.uf.upper() == declared_uf.upper()
 
 
+@lru_cache(maxsize=None)
+def get_cnpj_validator(timeout: float = 10.0) -> CNPJValidator:
+    """
+    Return a process-wide CNPJValidator for the given timeout.
+
+    Sharing one instance lets its 24h cache serve every document (and every
+    upload worker thread) of the same issuer instead of one lookup each. The
+    cache is bounded (CNPJValidator.CACHE_MAX_ENTRIES), so the long-lived
+    instance does not grow without limit.
+
+    Args:
+        timeout: HTTP request timeout in seconds
+
+    Returns:
+        Shared CNPJValidator instance
+    """
+    return CNPJValidator(timeout=timeout)
+
+
 class CEPValidator:
     """
     Validate CEP using ViaCEP API.
@@ -304,7 +354,7 @@ class CEPValidator:
         url = f"{self.BASE_URL}/{cep_clean}/json/"
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with httpx.AsyncClient(verify=shared_ssl_context()) as client:
                 response = await client.get(url, timeout=self.timeout)
                 
                 if response.status_code == 200:
@@ -329,9 +329,9 @@ def validate_cnpj_active_via_api(cnpj: str, enable_api_validation: bool = True)
         return True
     
     try:
-        from src.services.external_validators import CNPJValidator
+        from src.services.external_validators import get_cnpj_validator
         
-        validator = CNPJValidator(timeout=5.0)
+        validator = get_cnpj_validator(timeout=5.0)
         is_active = validator.is_cnpj_active(cnpj)
         
         logger.info(f"CNPJ {cnpj} API validation: {'active' if is_active else 'inactive'}")
@@ -406,9 +406,9 @@ def validate_razao_social_cnpj(cnpj: str, declared_name: str, enable_api_validat
         return True  # Skip if data missing
     
     try:
-        from src.services.external_validators import CNPJValidator
+        from src.services.external_validators import get_cnpj_validator
         
-        validator = CNPJValidator(timeout=5.0)
+        validator = get_cnpj_validator(timeout=5.0)
         matches = validator.validate_razao_social(cnpj, declared_name, threshold=0.7)
         
         logger.info(f"Razão social validation for CNPJ {cnpj}: {'matches' if matches else 'mismatch'}")
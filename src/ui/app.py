@@ -2,19 +2,26 @@
 
 import logging
 import sys
+import uuid
 from pathlib import Path
 
-# Add project root to path
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
+# Add project root to path once; Streamlit re-executes this module on every
+# rerun, so an unconditional insert would keep prepending duplicate entries.
+project_root = str(Path(__file__).resolve().parents[2])
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
 
-import plotly.graph_objects as go
+import altair as alt
+import pandas as pd
 import streamlit as st
+from sqlalchemy.exc import SQLAlchemyError
 
-from src.agent.agent_core import create_agent
+from src.agent.llm_cache import LLMCache
 from src.utils.agent_response_parser import AgentResponseParser
-from src.agent.chart_export_tool import get_pending_download, clear_pending_download
 import src.database.db as database_db
+from src.ui.components.async_upload import render_async_upload_tab
+from src.ui.components.documents_explorer import render_documents_explorer
+from src.ui.components.reports_tab import render_reports_tab
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,6 +29,36 @@ logger = logging.getLogger(__name__)
 
 # Constants
 COST_PER_LLM_CALL = 0.001  # USD per API call (used for savings estimation)
+AGENT_MODEL_NAME = "gemini-2.5-flash-lite"
+CHAT_HISTORY_WINDOW = 30  # Most recent messages rendered on each rerun
+
+# Main navigation sections (only the active one is executed on each rerun)
+TAB_HOME = "🏠 Home"
+TAB_DOCUMENTS = "📄 Documents"
+TAB_REPORTS = "📈 Reports"
+TAB_STATISTICS = "📊 Statistics"
+TABS = [TAB_HOME, TAB_DOCUMENTS, TAB_REPORTS, TAB_STATISTICS]
+
+# Example questions shown in the Home section
+CHAT_EXAMPLES_MD = """
+### 📋 Questions about YOUR documents:
+- "Quantas notas de compra temos?"
+- "Mostre vendas de 2024"
+- "Qual fornecedor tem mais compras?"
+
+### 📚 General fiscal/accounting knowledge:
+- "O que é ICMS?"
+- "Como calcular IPI?"
+- "Qual a diferença entre NFe e NFCe?"
+- "O que é Simples Nacional?"
+
+### 🌍 General knowledge:
+- "Quem foi Albert Einstein?"
+- "Como funciona a fotossíntese?"
+- "O que é um arquivo XML?"
+
+**The agent can answer ANYTHING!** 🚀
+"""
 
 st.set_page_config(
     page_title="Fiscal Document Agent",
@@ -30,22 +67,21 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# Minimal, elegant styling (Apple-inspired)
+# Minimal, elegant styling (Apple-inspired). Colors, heading color and button
+# radius come from [theme] in .streamlit/config.toml; only layout tweaks the
+# theme cannot express are injected here. Streamlit drops elements that are
+# not re-emitted on a rerun, so this must run every time rather than once per
+# session.
 st.markdown(
     """
     <style>
-      /* Reduce default padding and roundness for a cleaner look */
+      /* Reduce default padding for a cleaner look */
       .block-container {padding-top: 2rem; padding-bottom: 2rem;}
       section[data-testid="stSidebar"] .stMarkdown h2 {margin-top: 0.5rem;}
-      h1, h2, h3, h4 { color: #1D1D1F; }
-      .metric-label { color: #6e6e73; font-size: 0.9rem; }
-      .metric-value { color: #1D1D1F; font-weight: 600; }
       /* Subtle divider */
       hr {border: none; border-top: 1px solid #e5e5e7; margin: 0.75rem 0;}
-      /* Buttons */
-      .stButton>button { border-radius: 10px; padding: 0.5rem 1rem; }
-      /* Reduce upload section spacing */
-      .uploadedFile { padding: 0.5rem; }
+      /* Buttons (radius comes from the theme) */
+      .stButton>button { padding: 0.5rem 1rem; }
       /* Fix scroll jumping */
       html { scroll-behavior: smooth; }
     </style>
@@ -54,67 +90,197 @@ st.markdown(
 )
 
 
+@st.cache_resource(show_spinner=False)
+def build_agent(api_key: str, model_name: str):
+    """
+    Build the LLM client and ReAct agent once per (API key, model).
+
+    Shared across reruns and sessions; each session uses a fork() of it so
+    conversation memory stays private. The Gemini context cache belongs to
+    this build too and is only created on the first chat turn.
+
+    Args:
+        api_key: Google Gemini API key
+        model_name: Gemini model to use
+
+    Returns:
+        Shared FiscalDocumentAgent instance
+    """
+    # Imported here so LangChain and the Gemini client only load once an API
+    # key is configured, not on every cold start of the page
+    from src.agent.agent_core import create_agent
+
+    return create_agent(api_key=api_key, model_name=model_name)
+
+
 def init_agent(api_key: str) -> None:
     """
     Initialize the agent with the given API key.
 
+    The shared build comes from build_agent(), so this only forks it when the
+    session has no agent yet or the key changed. The key is read from the
+    agent itself; no separate session_state entry is kept.
+
     Args:
         api_key: Google Gemini API key
 
     Raises:
         ValueError: If API key is invalid or agent initialization fails
     """
-    if "agent" not in st.session_state or st.session_state.get("api_key") != api_key:
-        try:
-            logger.info("Initializing agent...")
-            st.session_state.agent = create_agent(api_key=api_key, model_name="gemini-2.5-flash-lite")
-            st.session_state.api_key = api_key
-            logger.info("Agent initialized successfully")
-        except (ValueError, KeyError, RuntimeError) as e:
-            logger.error(f"Failed to initialize agent: {e}", exc_info=True)
-            st.error(f"❌ Error initializing agent: {e}")
-            st.session_state.agent = None
+    agent = st.session_state.get("agent")
+    if agent is not None and agent.api_key == api_key:
+        return
+
+    try:
+        logger.info("Initializing agent...")
+        st.session_state.agent = build_agent(api_key, AGENT_MODEL_NAME).fork()
+        logger.info("Agent initialized successfully")
+    except (ValueError, KeyError, RuntimeError) as e:
+        logger.error(f"Failed to initialize agent: {e}", exc_info=True)
+        st.error(f"❌ Error initializing agent: {e}")
+        st.session_state.agent = None
+
+
+@st.cache_resource(show_spinner=False)
+def get_db(database_url: str) -> database_db.DatabaseManager:
+    """
+    Create one DatabaseManager (engine and connection pool) per database URL.
+
+    Args:
+        database_url: SQLAlchemy database URL
+
+    Returns:
+        DatabaseManager shared by all sessions and tabs
+    """
+    return database_db.DatabaseManager(database_url=database_url)
 
 
 def get_cached_db(db_path: str) -> database_db.DatabaseManager:
     """
-    Get or create cached database manager in session state.
+    Get the shared database manager for a database file.
 
     Args:
         db_path: Path to database file
 
     Returns:
-        DatabaseManager instance cached in session state
+        DatabaseManager instance, or None if the database cannot be opened
 
-    This avoids creating new connections on every rerun.
+    The manager is held by st.cache_resource, so the engine is created once
+    per path for the lifetime of the process instead of once per session.
+    """
+    try:
+        return get_db(f"sqlite:///{db_path}")
+    except (OSError, ValueError, RuntimeError) as e:
+        logger.error(f"Failed to initialize database: {e}")
+        st.error(f"❌ Error connecting to database: {e}")
+        return None
 
-    Raises:
-        OSError: If database path is invalid or inaccessible
-        ValueError: If database initialization fails
+
+def get_chat_session_id() -> str:
+    """
+    Return the id of this browser's chat session, kept in the URL (?sid=...).
+
+    The id survives page reloads, so the persisted conversation can be restored.
+
+    Returns:
+        Chat session id (created on first use)
     """
-    db_key = f"db_manager_{db_path}"
-    if db_key not in st.session_state:
+    session_id = st.query_params.get("sid")
+    if not session_id:
+        session_id = uuid.uuid4().hex
+        st.query_params["sid"] = session_id
+    return session_id
+
+
+def load_chat_history(db: database_db.DatabaseManager | None) -> list:
+    """
+    Restore this browser session's persisted chat messages.
+
+    Args:
+        db: Shared database manager (None if unavailable)
+
+    Returns:
+        List of message dicts (empty for a new session)
+    """
+    if not db:
+        return []
+    try:
+        return db.get_chat_messages(get_chat_session_id())
+    except (OSError, ValueError, RuntimeError, SQLAlchemyError) as e:
+        logger.warning(f"Could not load chat history: {e}")
+        return []
+
+
+def sync_agent_memory(agent, messages: list) -> None:
+    """
+    Replay the displayed conversation into a newly created or forked agent.
+
+    The session agent is replaced when the API key is entered or changed, so
+    the chat may already show turns the new agent has not seen. Each agent
+    is replayed once; later turns reach its memory as they are answered.
+
+    Args:
+        agent: Session agent
+        messages: Chat messages shown in this session
+    """
+    if st.session_state.get("chat_memory_agent") is agent:
+        return
+    for question, answer in zip(messages, messages[1:]):
+        if question["role"] == "user" and answer["role"] == "assistant":
+            agent.remember_exchange(question["content"], answer["content"])
+    st.session_state.chat_memory_agent = agent
+
+
+def clear_conversation(db: database_db.DatabaseManager | None, agent) -> None:
+    """
+    Forget this session's conversation: displayed messages, agent memory and
+    the persisted rows.
+
+    Args:
+        db: Shared database manager (None if unavailable)
+        agent: Session agent, or None if not configured yet
+    """
+    st.session_state.messages = []
+    st.session_state.greeted = False
+    if agent:
+        agent.reset_memory()
+    if db:
         try:
-            st.session_state[db_key] = database_db.DatabaseManager(
-                database_url=f"sqlite:///{db_path}"
-            )
-        except (OSError, ValueError, RuntimeError) as e:
-            logger.error(f"Failed to initialize database: {e}")
-            st.error(f"❌ Error connecting to database: {e}")
-            return None
-    return st.session_state[db_key]
+            db.delete_chat_messages(get_chat_session_id())
+        except (OSError, ValueError, RuntimeError, SQLAlchemyError) as e:
+            logger.warning(f"Could not delete chat history: {e}")
 
 
-def display_agent_response(response_text: str) -> None:
+def get_parsed_message(message: dict) -> dict:
+    """
+    Return the parsed components of a chat message, parsing it only once.
+
+    The result is stored on the message dict so history reruns skip the
+    regex/JSON extraction done by AgentResponseParser.
+
+    Args:
+        message: Chat message dict with "role" and "content"
+
+    Returns:
+        Parsed response dict (text, chart, file, download)
+    """
+    if "parsed" not in message:
+        message["parsed"] = AgentResponseParser.parse_response(message["content"])
+    return message["parsed"]
+
+
+def display_agent_response(response_text: str, parsed: dict | None = None) -> None:
     """
     Display agent response with proper rendering of charts and downloads.
     Cloud-compatible: uses in-memory BytesIO for all file operations.
     
     Args:
         response_text: Full agent response to process and display
+        parsed: Pre-parsed components of response_text (parsed here if omitted)
     """
     # Parse response into components
-    parsed = AgentResponseParser.parse_response(response_text)
+    if parsed is None:
+        parsed = AgentResponseParser.parse_response(response_text)
     
     # Debug: log what was found
     has_chart = parsed["chart"] is not None
@@ -131,13 +297,13 @@ def display_agent_response(response_text: str) -> None:
     # Render chart if present
     if parsed["chart"]:
         try:
-            logger.info(f"Rendering chart with st.plotly_chart()...")
+            logger.info("Rendering chart with st.plotly_chart()...")
             st.plotly_chart(
                 parsed["chart"],
                 use_container_width=True,
                 key=f"chart_{hash(str(parsed['chart'])) % 10000}"
             )
-            logger.info(f"✓ Chart rendered successfully")
+            logger.info("✓ Chart rendered successfully")
         except Exception as e:
             logger.error(f"Error rendering chart: {e}", exc_info=True)
             st.error(f"Error displaying chart: {e}")
@@ -148,6 +314,10 @@ def display_agent_response(response_text: str) -> None:
     
     # Render download button if download marker found
     if parsed["download"]:
+        # Download markers only come from agent answers; the export tool
+        # module (LangChain, plotly) is loaded the first time one is shown
+        from src.agent.chart_export_tool import clear_pending_download, get_pending_download
+
         download_info = parsed["download"]
         filename = download_info["filename"]
         mime_type = download_info["mime_type"]
@@ -175,7 +345,7 @@ def display_agent_response(response_text: str) -> None:
                 
                 # Clear from storage after rendering
                 clear_pending_download(filename)
-                logger.info(f"✓ Download button rendered and file cleared from storage")
+                logger.info("✓ Download button rendered and file cleared from storage")
             else:
                 st.warning(f"⚠️ File '{filename}' not found in storage. This may have already been downloaded.")
                 logger.warning(f"Download marker found but file not in storage: {filename}")
@@ -190,39 +360,207 @@ def display_agent_response(response_text: str) -> None:
         st.info(f"📥 **File ready for download: {file_info['filename']}'")
 
 
+@st.fragment
+def render_chat(db: database_db.DatabaseManager | None) -> None:
+    """
+    Render the chat history and input as an isolated fragment.
+
+    Sending a message only reruns this fragment, not the whole page.
+
+    Args:
+        db: Shared database manager backing the response cache (None if unavailable)
+    """
+    agent = st.session_state.get("agent")
+
+    # Initialize chat messages, restoring the conversation after a reload
+    if "messages" not in st.session_state:
+        st.session_state.messages = load_chat_history(db)
+        if st.session_state.messages:
+            # Returning user: the restored history replaces the greeting
+            st.session_state.greeted = True
+
+    # A new or re-forked agent learns the turns already shown
+    if agent:
+        sync_agent_memory(agent, st.session_state.messages)
+
+    # Greet once, as soon as an agent is available (it may be configured after
+    # the chat was first shown). get_greeting() is a static text, no LLM call.
+    if agent and not st.session_state.get("greeted"):
+        st.session_state.messages.insert(0, {"role": "assistant", "content": agent.get_greeting()})
+        st.session_state.greeted = True
+
+    # Display chat history: only the latest messages are rendered on every
+    # rerun; older turns are rendered when their expander is opened
+    messages = st.session_state.messages
+    older = messages[:-CHAT_HISTORY_WINDOW]
+    if older:
+        history = st.expander(
+            f"🕘 Show {len(older)} earlier messages", key="chat_history_older", on_change="rerun"
+        )
+        with history:
+            if history.open:
+                for message in older:
+                    with st.chat_message(message["role"]):
+                        display_agent_response(message["content"], get_parsed_message(message))
+
+    for message in messages[-CHAT_HISTORY_WINDOW:]:
+        with st.chat_message(message["role"]):
+            display_agent_response(message["content"], get_parsed_message(message))
+
+    # Chat input
+    if prompt := st.chat_input("Ask about your fiscal documents, taxes, or anything else..."):
+        # Check if agent is available
+        if not agent:
+            st.warning(
+                "⚠️ Please configure your Gemini API key in the sidebar to use the chat."
+            )
+        else:
+            # Show the user message now; it is stored with the answer below
+            user_message = {"role": "user", "content": prompt}
+            with st.chat_message("user"):
+                st.markdown(prompt)
+
+            # Get agent response (served from the response cache when possible)
+            llm_cache = LLMCache(db) if db else None
+            with st.chat_message("assistant"):
+                try:
+                    # Keyed on the prior turns too, so follow-ups never reuse
+                    # an answer given after a different conversation
+                    history = agent.history_digest() if llm_cache else ""
+                    response = (
+                        llm_cache.get(agent.model_name, prompt, agent.temperature, history)
+                        if llm_cache
+                        else None
+                    )
+                    if response is not None:
+                        agent.remember_exchange(prompt, response)
+                    else:
+                        # Stream the answer as raw text, then re-render it
+                        # below with charts/downloads once it is complete
+                        stream_placeholder = st.empty()
+                        with stream_placeholder.container():
+                            with st.spinner("🤔 Thinking..."):
+                                response = st.write_stream(agent.stream(prompt))
+                        stream_placeholder.empty()
+                        if llm_cache:
+                            llm_cache.set(
+                                agent.model_name, prompt, agent.temperature, response, history
+                            )
+                    
+                    # Debug: log the raw response for troubleshooting
+                    logger.info(f"Raw agent response ({len(response)} chars): {response[:200]}")
+                    if "```json" in response:
+                        logger.info("✓ Response contains ```json code fences")
+                    else:
+                        logger.warning("⚠️ Response does NOT contain ```json code fences")
+                    
+                    # Display agent response with proper rendering
+                    assistant_message = {"role": "assistant", "content": response}
+                    display_agent_response(response, get_parsed_message(assistant_message))
+                    
+                    # One history update per turn, in memory and on disk
+                    st.session_state.messages.extend([user_message, assistant_message])
+                    if db:
+                        try:
+                            db.save_chat_messages(
+                                get_chat_session_id(),
+                                [user_message, {"role": "assistant", "content": response}],
+                            )
+                        except SQLAlchemyError as e:
+                            logger.warning(f"Could not save chat history: {e}")
+                except (ValueError, KeyError, RuntimeError, TimeoutError) as e:
+                    error_msg = f"❌ Error processing message: {str(e)}"
+                    st.error(error_msg)
+                    logger.error(f"Chat error: {e}", exc_info=True)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_stats_cached(
+    _db: database_db.DatabaseManager, database_url: str, data_version: int
+) -> dict:
+    """
+    Return database statistics, recomputed only after writes or TTL expiry.
+
+    The "Documents by Type" chart spec is built here too, so a rerun of the
+    Statistics tab reuses it instead of rebuilding the DataFrame and chart.
+
+    Args:
+        _db: DatabaseManager instance (not hashed)
+        database_url: Database URL (cache key)
+        data_version: Invoice write counter of the manager (cache key)
+
+    Returns:
+        Statistics dictionary from get_statistics(), plus "type_chart" (Vega-Lite
+        spec, or None when there are no documents)
+    """
+    stats = _db.get_statistics()
+    type_chart = None
+    if stats.get("by_type_items"):
+        type_df = pd.DataFrame(stats["by_type_items"], columns=["Type", "Count"])
+        type_chart = alt.Chart(type_df).mark_bar().encode(x="Type", y="Count").to_dict()
+    return {**stats, "type_chart": type_chart}
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_cache_stats_cached(
+    _db: database_db.DatabaseManager, database_url: str, data_version: int
+) -> dict:
+    """
+    Return classification cache statistics, recomputed only after writes or TTL expiry.
+
+    Args:
+        _db: DatabaseManager instance (not hashed)
+        database_url: Database URL (cache key)
+        data_version: Invoice write counter of the manager (cache key)
+
+    Returns:
+        Statistics dictionary from get_cache_statistics()
+    """
+    return _db.get_cache_statistics()
+
+
 def main() -> None:
     """Main Streamlit application."""
     st.title("📄 Fiscal Document Agent")
     st.caption("Elegant, focused workspace for Brazilian fiscal documents")
 
-    # Show connection status in header if needed
-    if st.session_state.get("agent"):
-        st.success("✅ Agent Ready", icon="🤖")
+    # Connection status in header, filled once the sidebar has set up the agent
+    agent_status = st.empty()
 
     # Sidebar for configuration
     with st.sidebar:
         st.header("⚙️ Configuration")
 
-        # API Key input
-        api_key = st.text_input(
-            "Gemini API Key",
-            type="password",
-            help="Enter your Google Gemini API key for LLM-powered classification",
-        )
+        # Config inputs are batched in a form: editing them does not rerun the
+        # app until "Apply" is pressed, and the returned values only change then.
+        with st.form("config", clear_on_submit=False):
+            api_key = st.text_input(
+                "Gemini API Key",
+                type="password",
+                help="Enter your Google Gemini API key for LLM-powered classification",
+            )
+
+            # Storage settings
+            st.subheader("📁 Storage")
+            db_path = st.text_input("Database Path", value="./fiscal_documents.db")
+
+            st.form_submit_button("Apply", width="stretch")
+
+        # One lookup per rerun, shared by the sidebar and the selected section
+        db = get_cached_db(db_path)
 
-        # Initialize agent when API key is provided
+        # Initialize agent when API key is provided (no-op if unchanged)
         if api_key:
             init_agent(api_key)
-
-        # Storage settings
-        st.subheader("📁 Storage")
-        db_path = st.text_input("Database Path", value="./fiscal_documents.db")
+        else:
+            st.session_state.agent = None
+        agent = st.session_state.agent
 
         st.divider()
 
         # System status
         st.subheader("🔌 Connection")
-        if api_key and st.session_state.get("agent"):
+        if agent:
             st.success("✅ Connected to Gemini")
         elif api_key:
             st.warning("⏳ Initializing agent...")
@@ -231,126 +569,75 @@ def main() -> None:
 
         st.caption(f"💾 Database: {db_path}")
 
-    # Initialize tab selection in session state
-    if "selected_tab" not in st.session_state:
-        st.session_state.selected_tab = 0  # Default to Home tab
+        if st.button("🧹 Clear chat cache", help="Forget cached answers to repeated questions"):
+            if db:
+                st.toast(f"Removed {LLMCache(db).clear()} cached answers")
+
+        if st.button("🗑️ Clear conversation", help="Delete this session's chat history"):
+            clear_conversation(db, agent)
+
+    if agent:
+        agent_status.success("✅ Agent Ready", icon="🤖")
 
-    # Native Streamlit tabs - no CSS complexity
-    tab_home, tab_documents, tab_reports, tab_statistics = st.tabs(
-        ["🏠 Home", "📄 Documents", "📈 Reports", "📊 Statistics"]
+    # Radio-driven navigation: unlike st.tabs, which executes every tab body on
+    # each rerun, only the selected section's code (and DB queries) runs.
+    if "selected_tab" not in st.session_state:
+        st.session_state.selected_tab = TAB_HOME  # Default to Home tab
+
+    active_tab = st.radio(
+        "Section",
+        options=TABS,
+        horizontal=True,
+        label_visibility="collapsed",
+        key="selected_tab",
     )
 
     # ============= HOME TAB =============
-    with tab_home:
+    if active_tab == TAB_HOME:
         # Chat interface as primary interaction
         st.header("💬 Chat with Your Documents")
         st.caption("Ask ANY question in natural language. Portuguese or English.")
         
         # Info box about capabilities
         with st.expander("💡 What can you ask?", expanded=False):
-            st.markdown("""
-            ### 📋 Questions about YOUR documents:
-            - "Quantas notas de compra temos?"
-            - "Mostre vendas de 2024"
-            - "Qual fornecedor tem mais compras?"
-            
-            ### 📚 General fiscal/accounting knowledge:
-            - "O que é ICMS?"
-            - "Como calcular IPI?"
-            - "Qual a diferença entre NFe e NFCe?"
-            - "O que é Simples Nacional?"
-            
-            ### 🌍 General knowledge:
-            - "Quem foi Albert Einstein?"
-            - "Como funciona a fotossíntese?"
-            - "O que é um arquivo XML?"
-            
-            **The agent can answer ANYTHING!** 🚀
-            """)
-
-        # Initialize chat messages
-        if "messages" not in st.session_state:
-            st.session_state.messages = []
-
-            # Add greeting if agent is available
-            if st.session_state.get("agent"):
-                greeting = st.session_state.agent.get_greeting()
-                st.session_state.messages.append({"role": "assistant", "content": greeting})
-
-        # Display chat history
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                display_agent_response(message["content"])
-
-        # Chat input
-        if prompt := st.chat_input("Ask about your fiscal documents, taxes, or anything else..."):
-            # Check if agent is available
-            if not st.session_state.get("agent"):
-                st.warning(
-                    "⚠️ Please configure your Gemini API key in the sidebar to use the chat."
-                )
-            else:
-                # Add user message
-                st.session_state.messages.append({"role": "user", "content": prompt})
-                with st.chat_message("user"):
-                    st.markdown(prompt)
-
-                # Get agent response
-                with st.chat_message("assistant"):
-                    with st.spinner("🤔 Thinking..."):
-                        try:
-                            response = st.session_state.agent.chat(prompt)
-                            
-                            # Debug: log the raw response for troubleshooting
-                            logger.info(f"Raw agent response ({len(response)} chars): {response[:200]}")
-                            if "```json" in response:
-                                logger.info("✓ Response contains ```json code fences")
-                            else:
-                                logger.warning("⚠️ Response does NOT contain ```json code fences")
-                            
-                            # Display agent response with proper rendering
-                            display_agent_response(response)
-                            
-                            st.session_state.messages.append({"role": "assistant", "content": response})
-                        except (ValueError, KeyError, RuntimeError, TimeoutError) as e:
-                            error_msg = f"❌ Error processing message: {str(e)}"
-                            st.error(error_msg)
-                            logger.error(f"Chat error: {e}", exc_info=True)
+            st.markdown(CHAT_EXAMPLES_MD)
+
+        render_chat(db)
 
     # ============= DOCUMENTS TAB =============
-    with tab_documents:
+    elif active_tab == TAB_DOCUMENTS:
         # Upload Section - compact and collapsed by default
         with st.expander("⬆️ Upload Fiscal Documents", expanded=False):
             st.caption("Upload single XMLs, multiple files, or ZIP archives (NFe, NFCe, CTe, MDFe)")
-            from src.ui.components.async_upload import render_async_upload_tab
-            render_async_upload_tab()
+            render_async_upload_tab(db)
 
         # Explorer section - main focus
-        from src.ui.components.documents_explorer import render_documents_explorer
-        
-        db_docs = get_cached_db(db_path)
-        if db_docs:
-            render_documents_explorer(db_docs)
+        if db:
+            render_documents_explorer(db)
 
     # ============= REPORTS TAB =============
-    with tab_reports:
+    elif active_tab == TAB_REPORTS:
         # Reports Tab with full reporting functionality
-        from src.ui.components.reports_tab import render_reports_tab
-
-        db_reports = get_cached_db(db_path)
-        if db_reports:
-            render_reports_tab(db_reports)
+        if db:
+            render_reports_tab(db)
 
     # ============= STATISTICS TAB =============
-    with tab_statistics:
+    elif active_tab == TAB_STATISTICS:
         # Database statistics
         try:
-            db_stats_mgr = get_cached_db(db_path)
-            if not db_stats_mgr:
+            if not db:
                 st.error("Cannot connect to database")
                 return
 
-            db_stats = db_stats_mgr.get_statistics()
+            # Cached figures follow this process's writes; Refresh also picks up
+            # changes made outside the app (e.g. CLI imports) before the TTL.
+            if st.button("🔄 Refresh", key="stats_refresh"):
+                get_stats_cached.clear()
+                get_cache_stats_cached.clear()
+
+            db_stats = get_stats_cached(
+                db, db.database_url, db.data_version
+            )
 
             # Key metrics
             st.subheader("Overview")
@@ -367,13 +654,9 @@ def main() -> None:
             st.divider()
 
             # Documents by type
-            if db_stats.get("by_type"):
+            if db_stats["type_chart"]:
                 st.subheader("📊 Documents by Type")
-                type_df = {
-                    "Type": list(db_stats["by_type"].keys()),
-                    "Count": list(db_stats["by_type"].values()),
-                }
-                st.bar_chart(type_df, x="Type", y="Count", width='stretch')
+                st.vega_lite_chart(spec=db_stats["type_chart"], width="stretch")
             else:
                 st.info("No documents in database yet.")
 
@@ -383,7 +666,9 @@ def main() -> None:
             st.subheader("🎯 Classification Cache")
             st.caption("Intelligent system that reduces LLM costs by reusing classifications")
 
-            cache_stats = db_stats_mgr.get_cache_statistics()
+            cache_stats = get_cache_stats_cached(
+                db, db.database_url, db.data_version
+            )
 
             col1, col2, col3, col4 = st.columns(4)
             with col1:
@@ -393,7 +678,6 @@ def main() -> None:
             with col3:
                 st.metric("📈 Effectiveness", f"{cache_stats['cache_effectiveness']:.1f}%")
             with col4:
-                avg_hits = cache_stats["avg_hits_per_entry"]
                 cost_saved = cache_stats["total_hits"] * COST_PER_LLM_CALL
                 st.metric("💰 Savings", f"${cost_saved:.2f}")
 
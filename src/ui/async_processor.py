@@ -4,17 +4,82 @@ Allows parallel processing without blocking the UI.
 """
 
 import logging
+import os
+import queue
 import threading
 import time
 import uuid
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, List, Optional
 
 import streamlit as st
 
+from src.database.db import DatabaseManager
+from src.utils.file_processing import (
+    FileProcessor,
+    file_suffix,
+    format_items_dataframe,
+    format_result_details,
+    is_xml_member,
+)
+
 logger = logging.getLogger(__name__)
 
+CGROUP_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+
+
+@dataclass(slots=True)
+class JobError:
+    """A file that failed in a batch (kept in job["errors"])."""
+
+    file: str
+    index: int
+    error: str
+
+
+def _available_cpus() -> float:
+    """
+    Return the CPUs this process may use.
+
+    Reads the cgroup v2 quota (``"<quota> <period>"``, e.g. Streamlit Cloud
+    containers) and falls back to ``os.cpu_count()`` when there is no limit.
+    """
+    try:
+        with open(CGROUP_CPU_MAX) as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    return float(os.cpu_count() or 1)
+
+
+class _ConcurrencyLimit:
+    """Adjustable limit on how many pool tasks run at once."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._active = 0
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+
+    def __exit__(self, *exc_info):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify()
+
+    def set_limit(self, limit: int) -> None:
+        with self._condition:
+            self.limit = limit
+            self._condition.notify_all()
+
 
 class AsyncProcessor:
     """
@@ -24,31 +89,64 @@ class AsyncProcessor:
     Usa ThreadPoolExecutor para processamento paralelo com auto-tuning.
     """
 
+    # Coalesced session_state syncs while results come in: at most one per
+    # interval or per this many completed files, whichever comes first
+    SYNC_INTERVAL_SECONDS = 0.25
+    SYNC_EVERY_RESULTS = 100
+
+    # Parsed invoices are saved in chunks of this size as soon as they are
+    # complete, instead of being held in memory until the batch finishes
+    SAVE_CHUNK_SIZE = 100
+    # Chunks allowed to wait for the writer thread before workers block
+    SAVE_QUEUE_SIZE = 4
+
+    # Errors kept per job; further failures are only counted
+    # (job["errors_truncated"]) so a batch of broken files stays bounded
+    MAX_ERRORS = 1000
+
+    # Auto-tuning bounds, and how many completed files make one measurement
+    MIN_WORKERS = 2
+    MAX_WORKERS = 10
+    TUNE_EVERY_RESULTS = 50
+
     def __init__(self, max_workers: Optional[int] = None):
         """
         Initialize async processor with intelligent auto-tuning.
         
         Args:
-            max_workers: Maximum parallel threads. If None, auto-detects optimal value.
-                        Recommended: 5 for Streamlit Cloud (1 GB RAM)
+            max_workers: Maximum parallel threads. If None, starts at twice
+                        the available CPUs (parsing waits on the CNPJ/CEP
+                        lookups) and adjusts per batch from the measured
+                        files/sec.
         """
-        if max_workers is None:
-            # Auto-tune based on platform
-            # Streamlit Cloud: 1 GB RAM, optimal = 5 threads
-            # Local development: can go higher
-            self.max_workers = 5
+        self.auto_tune = max_workers is None
+        if self.auto_tune:
+            cpus = _available_cpus()
+            self.max_workers = max(self.MIN_WORKERS, min(self.MAX_WORKERS, int(cpus * 2)))
         else:
-            self.max_workers = min(max_workers, 10)  # Cap at 10 for safety
+            self.max_workers = min(max_workers, self.MAX_WORKERS)  # Cap for safety
             
+        # Guards the jobs/_job_locks dicts themselves (adding/removing jobs)
         self.lock = threading.Lock()
         
         # Local jobs storage (thread-safe alternative to session_state in threads)
         self.jobs: Dict[str, dict] = {}
+        # One lock per job for its counters and result/error lists, so
+        # concurrent jobs and status polls do not contend on self.lock
+        self._job_locks: Dict[str, threading.Lock] = {}
         
-        logger.info(f"AsyncProcessor initialized with {self.max_workers} workers (auto-tuned)")
+        logger.info(
+            f"AsyncProcessor initialized with {self.max_workers} workers"
+            f"{' (auto-tuned)' if self.auto_tune else ''}"
+        )
 
     def process_files_async(
-        self, files: List, company_id: str = "default", user_id: str = "anonymous"
+        self,
+        files: List,
+        company_id: str = "default",
+        user_id: str = "anonymous",
+        db_manager=None,
+        total_xmls: Optional[int] = None,
     ) -> str:
         """
         Process files asynchronously in parallel.
@@ -57,30 +155,33 @@ class AsyncProcessor:
             files: List of uploaded files (UploadedFile objects)
             company_id: Company identifier
             user_id: User identifier
+            db_manager: DatabaseManager to save into (the UI's configured
+                database). Defaults to DatabaseManager() if not given.
+            total_xmls: XML count already taken by the caller (e.g. the
+                upload tab); when given, the ZIP directories are not read
+                again just to count them.
             
         Returns:
             job_id: Unique identifier for tracking progress
         """
-        import zipfile
-        from io import BytesIO
-        
         job_id = str(uuid.uuid4())
 
         # Pre-count total XMLs (including inside ZIPs) for accurate progress
-        total_xmls = 0
-        for file in files:
-            if file.name.lower().endswith('.xml'):
-                total_xmls += 1
-            elif file.name.lower().endswith('.zip'):
-                try:
-                    file.seek(0)
-                    content = file.read()
-                    file.seek(0)  # Reset for later processing
-                    
-                    with zipfile.ZipFile(BytesIO(content)) as zf:
-                        total_xmls += sum(1 for f in zf.filelist if f.filename.lower().endswith('.xml'))
-                except:
-                    total_xmls += 1  # Count as 1 if ZIP reading fails
+        if total_xmls is None:
+            total_xmls = 0
+            for file in files:
+                suffix = file_suffix(file.name)
+                if suffix == "xml":
+                    total_xmls += 1
+                elif suffix == "zip":
+                    try:
+                        # Only the central directory is read; no copy of the archive
+                        file.seek(0)
+                        with zipfile.ZipFile(file) as zf:
+                            total_xmls += sum(1 for f in zf.filelist if is_xml_member(f))
+                        file.seek(0)  # Reset for later processing
+                    except:
+                        total_xmls += 1  # Count as 1 if ZIP reading fails
         
         # Initialize jobs dict in session_state (for UI access)
         if "processing_jobs" not in st.session_state:
@@ -99,9 +200,13 @@ class AsyncProcessor:
             "validated": 0,
             "saved": 0,
             "errors": [],
+            "errors_truncated": 0,
             "results": [],
+            # Datetimes are for display; durations use the monotonic clock
             "started_at": datetime.now(),
             "completed_at": None,
+            "started_monotonic": time.monotonic(),
+            "elapsed": None,
             "company_id": company_id,
             "user_id": user_id,
         }
@@ -109,6 +214,7 @@ class AsyncProcessor:
         # Store in both places
         with self.lock:
             self.jobs[job_id] = job_data
+            self._job_locks[job_id] = threading.Lock()
             st.session_state.processing_jobs[job_id] = job_data
 
         logger.info(f"Job {job_id} created with {total_xmls} XMLs from {len(files)} file(s)")
@@ -116,7 +222,7 @@ class AsyncProcessor:
         # Start processing in background thread
         thread = threading.Thread(
             target=self._process_batch,
-            args=(files, job_id, company_id, user_id),
+            args=(files, job_id, company_id, user_id, db_manager),
             daemon=True,
         )
         thread.start()
@@ -124,230 +230,386 @@ class AsyncProcessor:
         return job_id
 
     def _process_batch(
-        self, files: List, job_id: str, company_id: str, user_id: str
+        self, files: List, job_id: str, company_id: str, user_id: str, db_manager=None
     ) -> None:
         """
         Process batch of files in parallel using ThreadPoolExecutor.
         
         This runs in a background thread to avoid blocking UI.
         """
-        import zipfile
-        from io import BytesIO
-        from src.utils.file_processing import FileProcessor
-        from src.database.db import DatabaseManager
-
         logger.info(f"[{job_id}] Starting batch processing with {self.max_workers} workers")
 
+        with self.lock:
+            job_lock = self._job_locks.setdefault(job_id, threading.Lock())
+
         # Disable per-file DB writes; we'll persist later in batches for performance
         processor = FileProcessor(save_to_db=False)
-        db = DatabaseManager()
+        db = db_manager if db_manager is not None else DatabaseManager()
+
+        # A single writer thread saves chunks while the pool keeps parsing,
+        # so DB writes overlap with parsing instead of following it. None
+        # tells the writer that no more chunks are coming.
+        save_queue: "queue.Queue[Optional[List[Dict]]]" = queue.Queue(maxsize=self.SAVE_QUEUE_SIZE)
+
+        def write_chunks() -> None:
+            while True:
+                chunk = save_queue.get()
+                if chunk is None:
+                    return
+                self._save_chunk(db, chunk, job_id, job_lock)
+
+        writer_thread = threading.Thread(target=write_chunks, daemon=True)
+        writer_thread.start()
+
+        # Read files and submit each XML to the pool as soon as it is found.
+        # ZIP members are decompressed inside the workers (zlib releases the
+        # GIL), so extraction runs in parallel and overlaps with parsing.
+        # Archives stay open until every member task has finished.
+        open_archives = []
+        # With auto-tuning the pool has MAX_WORKERS threads and the limit
+        # decides how many of them run; it is revised every
+        # TUNE_EVERY_RESULTS files from the measured throughput.
+        limit = _ConcurrencyLimit(self.max_workers)
+        pool_size = self.MAX_WORKERS if self.auto_tune else self.max_workers
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            # Futures are dropped from the mapping once recorded so their
+            # results can be freed after the writer has saved them
+            future_to_file = {}
+            submitted = {"count": 0}
+            tune = {"done": 0, "since": time.monotonic(), "throughput": None}
+            # Results are recorded by a done-callback in the worker that
+            # finished them, so progress is visible while later files are
+            # still being read. self.jobs is always current (and is what
+            # get_job_status reads); the session_state copy is only refreshed
+            # in coalesced flushes, not once per file.
+            sync = {"last": time.monotonic(), "pending": 0}
+            # Bounded buffer of full results waiting to be saved; only the
+            # lightweight summaries stay in job["results"]
+            pending_saves: List[Dict] = []
+
+            def record(future) -> None:
+                idx, filename = future_to_file.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"[{job_id}] Exception processing {filename}: {e}", exc_info=True)
+                    result = {"status": "error", "file": filename, "index": idx, "error": str(e)}
 
-        # Step 1: Read all files and extract ZIPs
-        # This ensures ALL XMLs (from ZIPs + standalone) are processed in parallel
-        file_data = []
-        idx = 0
-        
-        for file in files:
-            try:
-                content = file.read()
-                filename = file.name
+                chunk = None
+                with job_lock:
+                    # Use local storage (thread-safe)
+                    job = self.jobs.get(job_id)
+                    if not job:
+                        logger.warning(f"[{job_id}] Job not found in local storage")
+                        return
+
+                    job["processed"] += 1
+
+                    if result["status"] == "success":
+                        job["successful"] += 1
+                        # Update fine-grained counters
+                        job["parsed"] += 1
+                        job["validated"] += 1
+                        job["results"].append(self._summarize_result(result))
+                        pending_saves.append(result)
+                        if len(pending_saves) >= self.SAVE_CHUNK_SIZE:
+                            chunk = pending_saves[:]
+                            pending_saves.clear()
+                        logger.info(f"[{job_id}] ✅ {filename} processed successfully")
+                    else:
+                        job["failed"] += 1
+                        self._add_error(
+                            job, JobError(file=result["file"], index=result["index"], error=result["error"])
+                        )
+                        logger.warning(f"[{job_id}] ❌ {filename} failed: {result.get('error')}")
+
+                    if self.auto_tune:
+                        self._tune_workers(limit, tune, submitted["count"], job_id)
+
+                    # Sync to session_state for UI updates
+                    sync["pending"] += 1
+                    now = time.monotonic()
+                    if (
+                        sync["pending"] >= self.SYNC_EVERY_RESULTS
+                        or now - sync["last"] >= self.SYNC_INTERVAL_SECONDS
+                    ):
+                        sync["last"] = now
+                        sync["pending"] = 0
+                        self._sync_session(job_id, job)
+
+                # Handed over outside the job lock: put() blocks while the
+                # writer is SAVE_QUEUE_SIZE chunks behind
+                if chunk:
+                    save_queue.put(chunk)
+
+            def run_limited(fn, *args):
+                with limit:
+                    return fn(*args)
+
+            def submit(index: int, filename: str, fn, *args) -> None:
+                future = executor.submit(run_limited, fn, processor, *args, filename, job_id, index)
+                future_to_file[future] = (index, filename)
+                submitted["count"] += 1
+                # Registered after the mapping exists; runs at once if already done
+                future.add_done_callback(record)
+
+            idx = 0
+            
+            for file in files:
+                try:
+                    filename = file.name
+                    suffix = file_suffix(filename)
                 
-                # Check if it's a ZIP file
-                if filename.lower().endswith('.zip'):
-                    logger.info(f"[{job_id}] Extracting ZIP: {filename}")
+                    # Check if it's a ZIP file
+                    if suffix == "zip":
+                        logger.info(f"[{job_id}] Extracting ZIP: {filename}")
                     
-                    try:
-                        with zipfile.ZipFile(BytesIO(content)) as zf:
+                        try:
+                            # Read members straight from the uploaded file object
+                            # instead of copying the whole archive into bytes first
+                            file.seek(0)
+                            zf = zipfile.ZipFile(file)
+                            open_archives.append(zf)
                             xml_count = 0
                             for file_info in zf.filelist:
-                                if file_info.filename.lower().endswith('.xml'):
-                                    xml_content = zf.read(file_info.filename)
-                                    # Add extracted XML to processing queue
-                                    file_data.append((idx, file_info.filename, xml_content))
+                                if is_xml_member(file_info):
+                                    submit(idx, file_info.filename, self._process_zip_member, zf, file_info)
                                     idx += 1
                                     xml_count += 1
                             
-                            logger.info(f"[{job_id}] ✅ Extracted {xml_count} XMLs from {filename}")
+                            logger.info(f"[{job_id}] ✅ Queued {xml_count} XMLs from {filename}")
                             
-                    except zipfile.BadZipFile as e:
-                        logger.error(f"[{job_id}] Invalid ZIP file {filename}: {e}")
-                        with self.lock:
-                            job = st.session_state.processing_jobs[job_id]
+                        except zipfile.BadZipFile as e:
+                            logger.error(f"[{job_id}] Invalid ZIP file {filename}: {e}")
+                            with job_lock:
+                                job = self.jobs[job_id]
+                                job["processed"] += 1
+                                job["failed"] += 1
+                                self._add_error(
+                                    job, JobError(file=filename, index=idx, error=f"Invalid ZIP: {str(e)}")
+                                )
+                            idx += 1
+                        
+                    elif suffix == "xml":
+                        # Standalone XML file
+                        submit(idx, filename, self._process_single_file, file.read())
+                        idx += 1
+                    
+                    else:
+                        # Unsupported file type
+                        logger.warning(f"[{job_id}] Skipping unsupported file: {filename}")
+                        with job_lock:
+                            job = self.jobs[job_id]
                             job["processed"] += 1
                             job["failed"] += 1
-                            job["errors"].append(
-                                {"file": filename, "index": idx, "error": f"Invalid ZIP: {str(e)}"}
+                            self._add_error(
+                                job, JobError(file=filename, index=idx, error="Unsupported file type (only XML and ZIP allowed)")
                             )
                         idx += 1
-                        
-                elif filename.lower().endswith('.xml'):
-                    # Standalone XML file
-                    file_data.append((idx, filename, content))
-                    idx += 1
                     
-                else:
-                    # Unsupported file type
-                    logger.warning(f"[{job_id}] Skipping unsupported file: {filename}")
-                    with self.lock:
-                        job = st.session_state.processing_jobs[job_id]
+                except Exception as e:
+                    logger.error(f"[{job_id}] Error reading file {file.name}: {e}")
+                    with job_lock:
+                        job = self.jobs[job_id]
                         job["processed"] += 1
                         job["failed"] += 1
-                        job["errors"].append(
-                            {"file": filename, "index": idx, "error": "Unsupported file type (only XML and ZIP allowed)"}
+                        self._add_error(
+                            job, JobError(file=file.name, index=idx, error=f"Read error: {str(e)}")
                         )
                     idx += 1
-                    
-            except Exception as e:
-                logger.error(f"[{job_id}] Error reading file {file.name}: {e}")
-                with self.lock:
-                    job = st.session_state.processing_jobs[job_id]
-                    job["processed"] += 1
-                    job["failed"] += 1
-                    job["errors"].append(
-                        {"file": file.name, "index": idx, "error": f"Read error: {str(e)}"}
-                    )
-                idx += 1
-        
-        # Log extracted XMLs count
-        logger.info(f"[{job_id}] Extracted {len(file_data)} XMLs from {len(files)} file(s), starting parallel processing")
-
-        # Process files in parallel
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all tasks
-            future_to_file = {
-                executor.submit(
-                    self._process_single_file, processor, content, filename, job_id, idx
-                ): (idx, filename)
-                for idx, filename, content in file_data
-            }
-
-            # Process as they complete
-            for future in as_completed(future_to_file):
-                idx, filename = future_to_file[future]
 
-                try:
-                    result = future.result(timeout=60)  # 60s timeout per file
-
-                    with self.lock:
-                        # Use local storage (thread-safe)
-                        job = self.jobs.get(job_id)
-                        if not job:
-                            logger.warning(f"[{job_id}] Job not found in local storage")
-                            return
+            logger.info(f"[{job_id}] Extracted {submitted['count']} XMLs from {len(files)} file(s)")
 
-                        job["processed"] += 1
-
-                        if result["status"] == "success":
-                            job["successful"] += 1
-                            # Update fine-grained counters
-                            job["parsed"] += 1
-                            job["validated"] += 1
-                            job["results"].append(result)
-                            logger.info(f"[{job_id}] ✅ {filename} processed successfully")
-                        else:
-                            job["failed"] += 1
-                            job["errors"].append(result)
-                            logger.warning(f"[{job_id}] ❌ {filename} failed: {result.get('error')}")
-                        
-                        # Sync to session_state for UI updates
-                        try:
-                            if "processing_jobs" in st.session_state:
-                                st.session_state.processing_jobs[job_id] = job
-                        except Exception as e:
-                            logger.debug(f"Could not sync to session_state: {e}")
-
-                except Exception as e:
-                    logger.error(f"[{job_id}] Exception processing {filename}: {e}", exc_info=True)
-                    with self.lock:
-                        job = self.jobs.get(job_id)
-                        if job:
-                            job["processed"] += 1
-                            job["failed"] += 1
-                            job["errors"].append(
-                                {"file": filename, "index": idx, "error": str(e)}
-                            )
-                            
-                            # Sync to session_state
-                            try:
-                                if "processing_jobs" in st.session_state:
-                                    st.session_state.processing_jobs[job_id] = job
-                            except Exception as sync_e:
-                                logger.debug(f"Could not sync to session_state: {sync_e}")
-
-        # Persist successfully processed results in batches of 100
-        try:
-            with self.lock:
-                job = self.jobs.get(job_id)
-                results_snapshot = list(job["results"]) if job else []
+        # Leaving the pool block above waited for every task and its callback
+        for zf in open_archives:
+            zf.close()
 
-            # Build invoices_data tuples for batch saving
-            invoices_data = []
-            for r in results_snapshot:
-                try:
-                    invoices_data.append((r["invoice"], r.get("issues", []), r.get("classification")))
-                except Exception as e:
-                    logger.error(f"[{job_id}] Failed assembling batch tuple for {r.get('file')}: {e}")
-                    with self.lock:
-                        if job:
-                            job["failed"] += 1
-                            job["errors"].append({
-                                "file": r.get("file"),
-                                "index": r.get("index"),
-                                "error": f"Batch assembly error: {e}"
-                            })
-
-            # Chunked saves
-            chunk_size = 100
-            for i in range(0, len(invoices_data), chunk_size):
-                chunk = invoices_data[i:i+chunk_size]
-                try:
-                    saved = db.save_invoices_batch(chunk)
-                    with self.lock:
-                        job = self.jobs.get(job_id)
-                        if job:
-                            job["saved"] += len(saved)
-                            # Sync to session_state for UI updates
-                            try:
-                                if "processing_jobs" in st.session_state:
-                                    st.session_state.processing_jobs[job_id] = job
-                            except Exception as e:
-                                logger.debug(f"Could not sync during save: {e}")
-                except Exception as e:
-                    logger.error(f"[{job_id}] Error saving batch {i//chunk_size+1}: {e}")
-                    with self.lock:
-                        job = self.jobs.get(job_id)
-                        if job:
-                            # Attribute the error to files in this chunk
-                            for r in results_snapshot[i:i+chunk_size]:
-                                job["errors"].append({
-                                    "file": r.get("file"),
-                                    "index": r.get("index"),
-                                    "error": f"DB save error: {e}"
-                                })
-                            # Consider these as failed saves but don't change parsed/validated
-        except Exception as e:
-            logger.error(f"[{job_id}] Unexpected error during batch save: {e}")
+        # Persist whatever is left in the buffer (fewer than SAVE_CHUNK_SIZE)
+        # and wait for the writer to drain the queue
+        if pending_saves:
+            save_queue.put(pending_saves[:])
+            pending_saves.clear()
+        save_queue.put(None)
+        writer_thread.join()
 
         # Mark job as completed
-        with self.lock:
+        with job_lock:
             job = self.jobs.get(job_id)
             if job:
                 job["status"] = "completed"
                 job["completed_at"] = datetime.now()
-                elapsed = (job["completed_at"] - job["started_at"]).total_seconds()
+                job["elapsed"] = elapsed = time.monotonic() - job["started_monotonic"]
                 
                 # Sync final state to session_state
-                try:
-                    if "processing_jobs" in st.session_state:
-                        st.session_state.processing_jobs[job_id] = job
-                except Exception as e:
-                    logger.debug(f"Could not sync final state to session_state: {e}")
+                self._sync_session(job_id, job)
                 
                 logger.info(
                     f"[{job_id}] ✅ Batch completed in {elapsed:.1f}s: "
                     f"{job['successful']}/{job['total']} successful, {job['saved']} saved"
                 )
 
+    def _sync_session(self, job_id: str, job: dict) -> None:
+        """
+        Publish a job to st.session_state for the UI.
+
+        Called at coalesced points only (periodic flushes, saved chunks,
+        completion, cancellation), never once per file. From worker threads
+        session_state may be unavailable; the job in self.jobs stays
+        authoritative either way.
+        """
+        try:
+            if "processing_jobs" in st.session_state:
+                st.session_state.processing_jobs[job_id] = job
+        except Exception as e:
+            logger.debug(f"Could not sync job {job_id} to session_state: {e}")
+
+    def _add_error(self, job: dict, error: JobError) -> None:
+        """Record a failed file, keeping at most MAX_ERRORS entries (caller holds the job lock)."""
+        if len(job["errors"]) < self.MAX_ERRORS:
+            job["errors"].append(error)
+        else:
+            job["errors_truncated"] += 1
+
+    def _tune_workers(
+        self, limit: _ConcurrencyLimit, tune: Dict, submitted: int, job_id: str
+    ) -> None:
+        """
+        Adjust the concurrency limit from the throughput of the last window.
+
+        Called once per completed file (under the job lock). Every
+        TUNE_EVERY_RESULTS files the files/sec of the window is compared with
+        the previous one: a drop of more than 10% removes a worker, otherwise
+        a worker is added while more files are waiting than are running.
+
+        Args:
+            limit: Concurrency limit of the running batch
+            tune: Window state ("done", "since", "throughput")
+            submitted: Files submitted to the pool so far
+            job_id: Parent job ID
+        """
+        tune["done"] += 1
+        if tune["done"] % self.TUNE_EVERY_RESULTS:
+            return
+
+        now = time.monotonic()
+        throughput = self.TUNE_EVERY_RESULTS / max(now - tune["since"], 1e-6)
+        previous = tune["throughput"]
+        tune["since"] = now
+        tune["throughput"] = throughput
+
+        workers = limit.limit
+        if previous is not None and throughput < previous * 0.9:
+            workers = max(self.MIN_WORKERS, workers - 1)
+        elif submitted - tune["done"] > workers:
+            workers = min(self.MAX_WORKERS, workers + 1)
+
+        if workers != limit.limit:
+            logger.info(
+                f"[{job_id}] {throughput:.1f} files/s, adjusting workers "
+                f"{limit.limit} -> {workers}"
+            )
+            limit.set_limit(workers)
+            # Later batches of this processor start from the tuned value
+            self.max_workers = workers
+
+    def _save_chunk(self, db, chunk: List[Dict], job_id: str, job_lock: threading.Lock) -> None:
+        """
+        Save a chunk of successful results and update the job's saved counter.
+
+        Args:
+            db: DatabaseManager to save into
+            chunk: Successful result dicts (with invoice, issues, classification)
+            job_id: Parent job ID
+            job_lock: Lock guarding the job's counters and lists
+        """
+        invoices_data = [(r["invoice"], r.get("issues", []), r.get("classification")) for r in chunk]
+        try:
+            saved = db.save_invoices_batch(invoices_data)
+        except Exception as e:
+            logger.error(f"[{job_id}] Error saving batch of {len(chunk)}: {e}")
+            with job_lock:
+                job = self.jobs.get(job_id)
+                if job:
+                    # Attribute the error to files in this chunk
+                    # (parsed/validated counters are left unchanged)
+                    for r in chunk:
+                        self._add_error(
+                            job, JobError(file=r["file"], index=r["index"], error=f"DB save error: {e}")
+                        )
+            return
+
+        with job_lock:
+            job = self.jobs.get(job_id)
+            if job:
+                job["saved"] += len(saved)
+                # Sync to session_state for UI updates
+                self._sync_session(job_id, job)
+
+    @staticmethod
+    def _summarize_result(result: Dict) -> Dict:
+        """
+        Reduce a successful result to what the results view displays.
+
+        The InvoiceModel, issues and classification are dropped once saved,
+        so a large batch does not keep every parsed document in memory.
+
+        Args:
+            result: Successful result dict from _process_single_file
+
+        Returns:
+            Dict with file, index, status, document key/type, totals,
+            items grid and pre-formatted details
+        """
+        invoice = result["invoice"]
+        return {
+            "status": "success",
+            "file": result["file"],
+            "index": result["index"],
+            "document_key": invoice.document_key,
+            "document_type": invoice.document_type,
+            "total_products": invoice.total_products,
+            "total_taxes": invoice.total_taxes,
+            "total_invoice": invoice.total_invoice,
+            "items": format_items_dataframe(invoice) if invoice.items else None,
+            "details": result["details"],
+        }
+
+    def _process_zip_member(
+        self, processor, zf, file_info: zipfile.ZipInfo, filename: str, job_id: str, file_index: int
+    ) -> Dict:
+        """
+        Decompress one ZIP member in the worker thread, then process it.
+
+        ZipFile serializes access to the underlying file, so members of the
+        same archive can be read from several threads. The member is opened
+        by its ZipInfo, so entries sharing a name are each read once instead
+        of the last one twice. It is still read whole: the parser keeps the
+        raw XML on the InvoiceModel (raw_xml) for storage.
+
+        Args:
+            processor: FileProcessor instance
+            zf: Open ZipFile shared by the batch
+            file_info: Central directory entry of the member
+            filename: Member name of the XML file
+            job_id: Parent job ID
+            file_index: Index in the batch
+
+        Returns:
+            Dict with status and results or error
+        """
+        try:
+            with zf.open(file_info) as src:
+                content = src.read()
+        except (zipfile.BadZipFile, OSError, ValueError) as e:
+            logger.error(f"[{job_id}] Error extracting {filename}: {e}")
+            return {
+                "status": "error",
+                "file": filename,
+                "index": file_index,
+                "error": f"Extraction error: {str(e)}",
+            }
+        return self._process_single_file(processor, content, filename, job_id, file_index)
+
     def _process_single_file(
         self, processor, file_content: bytes, filename: str, job_id: str, file_index: int
     ) -> Dict:
@@ -372,13 +634,19 @@ class AsyncProcessor:
 
             if result:
                 # result is a tuple: (filename, InvoiceModel, issues, classification)
+                classification = result[3] if len(result) > 3 else None
                 return {
                     "status": "success",
                     "file": result[0],  # filename
                     "index": file_index,
                     "invoice": result[1],  # InvoiceModel
                     "issues": result[2],  # ValidationIssue list
-                    "classification": result[3] if len(result) > 3 else None,
+                    "classification": classification,
+                    # Display strings are built here, off the script thread,
+                    # so reruns of the results view never re-format them
+                    "details": format_result_details(
+                        result[0], result[1], result[2], classification
+                    ),
                 }
             else:
                 return {
@@ -446,11 +714,7 @@ class AsyncProcessor:
                 logger.info(f"[{job_id}] Job cancelled by user")
                 
                 # Sync to session_state
-                try:
-                    if "processing_jobs" in st.session_state:
-                        st.session_state.processing_jobs[job_id] = job
-                except Exception as e:
-                    logger.debug(f"Could not sync cancellation to session_state: {e}")
+                self._sync_session(job_id, job)
                 
                 return True
 
@@ -470,6 +734,7 @@ class AsyncProcessor:
             # Remove from local storage
             if job_id in self.jobs:
                 del self.jobs[job_id]
+            self._job_locks.pop(job_id, None)
             
             # Remove from session_state
             try:
@@ -502,3 +767,18 @@ class AsyncProcessor:
                 logger.debug(f"Could not sync all jobs to session_state: {e}")
             
             return self.jobs.copy()
+
+
+def get_session_processor() -> AsyncProcessor:
+    """
+    Return the AsyncProcessor of the current Streamlit session.
+
+    Created once per session instead of on every rerun, so its jobs, locks
+    and auto-tuned worker count survive between the progress reruns.
+
+    Returns:
+        The session's AsyncProcessor
+    """
+    if "async_processor" not in st.session_state:
+        st.session_state.async_processor = AsyncProcessor()
+    return st.session_state.async_processor
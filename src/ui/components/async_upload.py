@@ -3,49 +3,73 @@ Async upload component for Streamlit.
 Provides non-blocking upload with real-time progress tracking.
 """
 
+import csv
+import io
 import logging
+import math
 import time
-from datetime import datetime
+import zipfile
 
+import pandas as pd
 import streamlit as st
 
-from src.ui.async_processor import AsyncProcessor
-from src.utils.file_processing import format_classification, format_validation_issues
+from src.ui.async_processor import get_session_processor
+from src.ui.components.progress_monitor import create_progress_monitor, progress_metrics_markdown
+from src.utils.file_processing import file_suffix, is_xml_member
 
 logger = logging.getLogger(__name__)
 
 
-def render_async_upload_tab():
-    """Render async upload tab with real-time progress and auto-tuned parallelism."""
+# ZIPs above this size get an XML count estimated from their size instead
+# of a walk over their central directory
+ZIP_ESTIMATE_THRESHOLD_BYTES = 100 * 1024 * 1024
+AVG_COMPRESSED_XML_BYTES = 8 * 1024
 
-    st.header("⚡ Upload Fiscal Documents")
-    
-    # Warning about background job
-    if "current_job_id" in st.session_state:
-        processor = AsyncProcessor()
-        job = processor.get_job_status(st.session_state.current_job_id)
-        if job and job["status"] == "processing":
-            st.info("⏳ **Processing Active**. You can freely navigate between tabs. Processing continues in the background.", icon="📋")
-    
-    # File uploader
+# Successful results rendered per page of the results list
+RESULTS_PAGE_SIZE = 50
 
-import logging
-import time
-from datetime import datetime
 
-import streamlit as st
+@st.cache_data(show_spinner=False)
+def _count_zip_xmls(file_id: str, size: int, _file) -> int:
+    """
+    Count the XML documents inside an uploaded ZIP.
 
-from src.ui.async_processor import AsyncProcessor
-from src.utils.file_processing import format_classification, format_validation_issues
+    Cached by the upload's file_id (stable across reruns), so the progress
+    polling reruns do not re-read every archive's central directory.
 
-logger = logging.getLogger(__name__)
+    Args:
+        file_id: Streamlit UploadedFile id
+        size: File size in bytes (part of the cache key)
+        _file: The UploadedFile itself (not hashed)
 
+    Returns:
+        Number of XML members (1 if the ZIP cannot be read)
+    """
+    try:
+        # Only the central directory is read; no copy of the archive
+        _file.seek(0)
+        with zipfile.ZipFile(_file) as zf:
+            return sum(1 for f in zf.filelist if is_xml_member(f))
+    except (zipfile.BadZipFile, OSError, ValueError):
+        # If ZIP is invalid, count as 1 to avoid confusion
+        return 1
+    finally:
+        _file.seek(0)  # Reset for later processing
 
-def render_async_upload_tab():
-    """Render async upload tab with real-time progress and auto-tuned parallelism."""
 
-    st.header("⚡ Upload de Documentos Fiscais")
-    
+def render_async_upload_tab(db_manager=None):
+    """
+    Render async upload tab with real-time progress and auto-tuned parallelism.
+
+    Args:
+        db_manager: DatabaseManager for the configured database path
+    """
+
+    st.header("⚡ Upload Fiscal Documents")
+
+    if "upload_started_message" in st.session_state:
+        st.toast(st.session_state.pop("upload_started_message"))
+
     # Info banner with document support
     st.info(
         "📄 **Supported Documents:** NFe, NFCe, CTe (transport), MDFe (manifest) | "
@@ -74,7 +98,7 @@ def render_async_upload_tab():
         
         # Check if there is active job in processing
         if "current_job_id" in st.session_state:
-            processor = AsyncProcessor()
+            processor = get_session_processor()
             job = processor.get_job_status(st.session_state.current_job_id)
             if job and job["status"] == "processing":
                 st.divider()
@@ -85,42 +109,43 @@ def render_async_upload_tab():
         return
 
     # Count XMLs (including those inside ZIPs)
-    import zipfile
-    from io import BytesIO
-    
     xml_count = 0
     zip_count = 0
     total_xml_count = 0
+    estimated = False
     
     for file in uploaded_files:
-        if file.name.lower().endswith('.xml'):
+        suffix = file_suffix(file.name)
+        if suffix == "xml":
             xml_count += 1
             total_xml_count += 1
-        elif file.name.lower().endswith('.zip'):
+        elif suffix == "zip":
             zip_count += 1
-            # Count XMLs inside ZIP
-            try:
-                file.seek(0)  # Reset file pointer
-                content = file.read()
-                file.seek(0)  # Reset again for later processing
-                
-                with zipfile.ZipFile(BytesIO(content)) as zf:
-                    xml_in_zip = sum(1 for f in zf.filelist if f.filename.lower().endswith('.xml'))
-                    total_xml_count += xml_in_zip
-            except:
-                # If ZIP is invalid, count as 1 to avoid confusion
-                total_xml_count += 1
+            if file.size > ZIP_ESTIMATE_THRESHOLD_BYTES:
+                # Very large archive: estimate instead of walking its directory;
+                # the job counts the members exactly when it starts
+                total_xml_count += max(1, file.size // AVG_COMPRESSED_XML_BYTES)
+                estimated = True
+            else:
+                # Count XMLs inside ZIP (once per upload, not on every rerun)
+                total_xml_count += _count_zip_xmls(file.file_id, file.size, file)
     
-    st.success(f"✅ **{total_xml_count} XMLs** detected ({xml_count} loose + {zip_count} ZIP(s))")
+    if estimated:
+        st.success(
+            f"✅ **~{total_xml_count} XMLs** (estimated from file size) "
+            f"({xml_count} loose + {zip_count} ZIP(s))"
+        )
+    else:
+        st.success(f"✅ **{total_xml_count} XMLs** detected ({xml_count} loose + {zip_count} ZIP(s))")
 
-    # Auto-configure optimal thread count (max performance)
-    max_workers = 5  # Optimal for Streamlit Cloud (1 GB RAM)
+    # Auto-tuned thread count (from the CPUs available to this container)
+    max_workers = get_session_processor().max_workers
     
     # Show metrics
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("📋 XMLs", total_xml_count)
+        st.metric("📋 XMLs", f"~{total_xml_count}" if estimated else total_xml_count)
     
     with col2:
         estimated_time = total_xml_count * 2 / max_workers  # ~2s per XML
@@ -135,53 +160,100 @@ def render_async_upload_tab():
         type="primary",
         use_container_width=True,
     ):
-        # Auto-tuned processor (no manual configuration needed)
-        processor = AsyncProcessor()
+        # Auto-tuned processor shared by the session (no manual configuration needed)
+        processor = get_session_processor()
 
         # Start async processing
         job_id = processor.process_files_async(
             files=uploaded_files,
             company_id=st.session_state.get("company_id", "default"),
             user_id=st.session_state.get("user_id", "anonymous"),
+            db_manager=db_manager,
+            total_xmls=None if estimated else total_xml_count,
         )
 
         st.session_state.current_job_id = job_id
-        st.success(f"✅ Processing **{total_xml_count} XMLs** started!")
+        # Shown as a toast by the next run; anything drawn here is dropped
+        # by the rerun
+        st.session_state.upload_started_message = (
+            f"✅ Processing {'~' if estimated else ''}{total_xml_count} XMLs started!"
+        )
 
-        # Force rerun to show progress
-        time.sleep(0.5)
+        # Rerun right away to show progress
         st.rerun()
 
     # Show current job progress usando progress monitor (sem st.rerun)
     if "current_job_id" in st.session_state:
         st.divider()
         
-        from src.ui.components.progress_monitor import create_progress_monitor
-        
         # Este monitor atualiza automaticamente usando placeholders (não bloqueia UI)
         final_status = create_progress_monitor(st.session_state.current_job_id)
         
         # Mostrar resultados finais
         if final_status and final_status["status"] == "completed":
-            _show_job_results(final_status)
+            _show_job_results(st.session_state.current_job_id, final_status)
             
             # Limpar job ID após visualização
-            if st.button("🗑️ Limpar resultados"):
+            if st.button("🗑️ Clear results"):
                 del st.session_state.current_job_id
                 st.rerun()
 
 
 
 
-def _show_job_results(job: dict):
+@st.cache_data(ttl=600, show_spinner=False)
+def _errors_csv(job_id: str, error_count: int, _errors: list) -> str:
+    """
+    Build the error list CSV of a finished job.
+
+    Errors no longer change once a job has completed, so the CSV is built
+    once per (job, error count) instead of on every rerun of the results.
+
+    Args:
+        job_id: Job identifier
+        error_count: Number of errors (part of the cache key)
+        _errors: The job's JobError list (not hashed)
+
+    Returns:
+        CSV text with file, index and error columns
+    """
+    csv_buffer = io.StringIO()
+    writer = csv.writer(csv_buffer)
+    writer.writerow(["file", "index", "error"])
+    for e in _errors:
+        writer.writerow([e.file, e.index, e.error])
+    return csv_buffer.getvalue()
+
+
+def _render_errors_table(errors: list):
+    """
+    Render a job's errors as one table.
+
+    A single Arrow-backed grid instead of one st.error element per failed
+    file, so large error lists are sent and displayed in one piece.
+
+    Args:
+        errors: The job's JobError list
+    """
+    st.dataframe(
+        pd.DataFrame(
+            [(e.file, e.index, e.error) for e in errors],
+            columns=["file", "index", "error"],
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+def _show_job_results(job_id: str, job: dict):
     """Show completed job results with tabs for success vs errors."""
     
     st.divider()
     st.success(f"✅ Processing completed: {job['successful']} successes, {job['failed']} failures")
     
     # Time summary
-    if job.get("completed_at"):
-        total_time = (job["completed_at"] - job["started_at"]).total_seconds()
+    if job.get("elapsed") is not None:
+        total_time = job["elapsed"]
         st.caption(f"⏱️ Total time: {total_time:.1f}s ({total_time/60:.1f} min)")
     
     # Tabs for success vs errors
@@ -194,27 +266,19 @@ def _show_job_results(job: dict):
 
     with tab1:
         if job.get("results"):
-            for result in job["results"]:
-                _render_success_result(result)
+            _render_results_page(job["results"])
         else:
             st.info("No document was successfully processed")
 
     with tab2:
         if job.get("errors"):
-            for error in job["errors"]:
-                st.error(
-                    f"**{error['file']}** (index {error['index']}): {error['error']}"
-                )
+            _render_errors_table(job["errors"])
+            if job.get("errors_truncated"):
+                st.caption(f"+ {job['errors_truncated']} more errors (not listed)")
             # Download CSV of errors
-            import io, csv
-            csv_buffer = io.StringIO()
-            writer = csv.writer(csv_buffer)
-            writer.writerow(["file", "index", "error"]) 
-            for e in job["errors"]:
-                writer.writerow([e.get("file"), e.get("index"), e.get("error")])
             st.download_button(
                 label="⬇️ Download error list (CSV)",
-                data=csv_buffer.getvalue(),
+                data=_errors_csv(job_id, len(job["errors"]), job["errors"]),
                 file_name=f"upload_errors_{job['started_at'].strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv",
                 use_container_width=True,
@@ -226,7 +290,7 @@ def _show_job_results(job: dict):
 def render_job_progress(job_id: str):
     """Render real-time progress for a job."""
 
-    processor = AsyncProcessor()
+    processor = get_session_processor()
     job = processor.get_job_status(job_id)
 
     if not job:
@@ -240,57 +304,54 @@ def render_job_progress(job_id: str):
     # Header with job ID
     st.subheader(f"📊 Processing: `{job_id[:8]}...`")
 
-    # Status badge
-    status = job["status"]
-    status_container = st.empty()
-    
-    with status_container.container():
+    # Placeholders updated in place while the job runs, instead of
+    # rerunning the whole script for every refresh
+    status_ph = st.empty()
+    progress_ph = st.empty()
+    metrics_ph = st.empty()
+    caption_ph = st.empty()
+
+    while True:
+        # Status badge
+        status = job["status"]
         if status == "processing":
-            st.info("⏳ Processing in the background... (interface remains usable)", icon="ℹ️")
+            status_ph.info("⏳ Processing in the background... (interface remains usable)", icon="ℹ️")
         elif status == "completed":
-            st.success("✅ Processing completed!")
+            status_ph.success("✅ Processing completed!")
         elif status == "cancelled":
-            st.warning("⚠️ Processing cancelled")
+            status_ph.warning("⚠️ Processing cancelled")
         else:
-            st.error(f"❌ Status: {status}")
-
-    # Progress bar (use saved/total to reflect persistence)
-    progress = job.get("saved", 0) / job["total"] if job["total"] > 0 else 0
-    st.progress(progress, text=f"{job.get('saved', 0)}/{job['total']} saved to database")
-
-    # Extended Metrics
-    col1, col2, col3, col4, col5, col6 = st.columns(6)
+            status_ph.error(f"❌ Status: {status}")
+
+        # Progress bar (use saved/total to reflect persistence)
+        progress = job.get("saved", 0) / job["total"] if job["total"] > 0 else 0
+        progress_ph.progress(progress, text=f"{job.get('saved', 0)}/{job['total']} saved to database")
+
+        # Extended Metrics (one table element instead of six metrics)
+        metrics_ph.markdown(progress_metrics_markdown(job))
+
+        # Time tracking
+        if status == "completed" and job["elapsed"] is not None:
+            total_time = job["elapsed"]
+            caption_ph.caption(f"⏱️ Total time: {total_time:.1f}s ({total_time/60:.1f} min)")
+        elif status == "processing":
+            elapsed = time.monotonic() - job["started_monotonic"]
+            avg_time = elapsed / job["processed"] if job["processed"] > 0 else 2
+            remaining = (job["total"] - job["processed"]) * avg_time
+            caption_ph.caption(
+                f"⏱️ Elapsed: {elapsed:.1f}s | Remaining: ~{remaining:.0f}s"
+            )
 
-    with col1:
-        st.metric("📋 Discovered", job.get("discovered", job["total"]))
-    with col2:
-        st.metric("🧩 Parsed", job.get("parsed", 0))
-    with col3:
-        st.metric("✅ Validated", job.get("validated", 0))
-    with col4:
-        st.metric("💾 Saved", job.get("saved", 0))
-    with col5:
-        st.metric("⚙️ Processed", job["processed"])
-    with col6:
-        st.metric("❌ Failures", job["failed"])
-
-    # Time tracking
-    elapsed = (datetime.now() - job["started_at"]).total_seconds()
-    
-    if status == "completed" and job["completed_at"]:
-        total_time = (job["completed_at"] - job["started_at"]).total_seconds()
-        st.caption(f"⏱️ Total time: {total_time:.1f}s ({total_time/60:.1f} min)")
-    elif status == "processing":
-        avg_time = elapsed / job["processed"] if job["processed"] > 0 else 2
-        remaining = (job["total"] - job["processed"]) * avg_time
-        st.caption(
-            f"⏱️ Elapsed: {elapsed:.1f}s | Remaining: ~{remaining:.0f}s"
-        )
+        if status != "processing":
+            break
 
-    # Auto-refresh while processing (1s polling)
-    if status == "processing":
-        time.sleep(1)
-        st.rerun()
+        # Poll at about a quarter of the time per file (0.5-5s): slow jobs
+        # refresh less often, fast ones finish sooner
+        time.sleep(min(5.0, max(0.5, avg_time / 4)))
+        job = processor.get_job_status(job_id)
+        if not job:
+            # Cleared while we were waiting
+            return
 
     # Results section (only when completed)
     if status == "completed":
@@ -306,27 +367,19 @@ def render_job_progress(job_id: str):
 
         with tab1:
             if job["results"]:
-                for result in job["results"]:
-                    _render_success_result(result)
+                _render_results_page(job["results"], key_prefix=f"job_{job_id[:8]}")
             else:
                 st.info("No documents were successfully processed")
 
         with tab2:
             if job["errors"]:
-                for error in job["errors"]:
-                    st.error(
-                        f"**{error['file']}** (index {error['index']}): {error['error']}"
-                    )
+                _render_errors_table(job["errors"])
+                if job.get("errors_truncated"):
+                    st.caption(f"+ {job['errors_truncated']} more errors (not listed)")
                 # Provide CSV download of errors
-                import io, csv
-                csv_buffer = io.StringIO()
-                writer = csv.writer(csv_buffer)
-                writer.writerow(["file", "index", "error"])
-                for e in job["errors"]:
-                    writer.writerow([e.get("file"), e.get("index"), e.get("error")])
                 st.download_button(
                     label="⬇️ Download errors (CSV)",
-                    data=csv_buffer.getvalue(),
+                    data=_errors_csv(job_id, len(job["errors"]), job["errors"]),
                     file_name=f"upload_errors_{job_id[:8]}.csv",
                     mime="text/csv",
                     use_container_width=True,
@@ -351,89 +404,100 @@ def render_job_progress(job_id: str):
                 st.rerun()
 
 
-def _render_success_result(result: dict):
-    """Render a successful processing result with visual document type badges."""
-    
-    invoice = result["invoice"]
-    issues = result.get("issues", [])
-    classification = result.get("classification")
-    
-    # Document type emoji and color
-    doc_type_info = {
-        "NFe": {"emoji": "🧾", "color": "blue"},
-        "NFCe": {"emoji": "🧾", "color": "green"},
-        "CTe": {"emoji": "🚚", "color": "orange"},
-        "MDFe": {"emoji": "📋", "color": "purple"},
-    }
-    
-    info = doc_type_info.get(invoice.document_type, {"emoji": "📄", "color": "gray"})
+def _render_results_page(results: list, key_prefix: str = "upload_result"):
+    """
+    Render one page of successful results.
+
+    Only RESULTS_PAGE_SIZE expanders are emitted per rerun, with a page
+    selector when there are more, instead of one per processed document.
+
+    Args:
+        results: Successful result summaries from AsyncProcessor
+        key_prefix: Prefix for the widget keys (unique per results list)
+    """
+    page_count = math.ceil(len(results) / RESULTS_PAGE_SIZE)
+    page = 1
+    if page_count > 1:
+        page = st.number_input(
+            f"Page (of {page_count})",
+            min_value=1,
+            max_value=page_count,
+            value=1,
+            key=f"{key_prefix}_page",
+        )
+    start = (page - 1) * RESULTS_PAGE_SIZE
+    for result in results[start:start + RESULTS_PAGE_SIZE]:
+        _render_success_result(result, key_prefix=key_prefix)
+
+
+def _render_success_result(result: dict, key_prefix: str = "upload_result"):
+    """
+    Render a successful processing result with visual document type badges.
+
+    The expander tracks its open state, so the detail content (markdown,
+    metrics, classification and issue formatting) is only built for the
+    result the user opened rather than for every processed document. The
+    markdown itself is formatted once by the worker (``result["details"]``).
+
+    Args:
+        result: Successful result summary from AsyncProcessor
+        key_prefix: Prefix for the expander key (unique per results list)
+    """
     
-    # Build expander title with document type badge
-    title = f"{info['emoji']} **{invoice.document_type}** {invoice.document_number}"
-    if invoice.document_type in ["CTe", "MDFe"]:
-        title += f" - {result['file']}"
-    else:
-        title += f" - {invoice.issuer_name[:30]}..."
+    details = result["details"]
+
+    expander = st.expander(
+        details["title"], expanded=False, key=f"{key_prefix}_{result['index']}", on_change="rerun"
+    )
+    with expander:
+        if not expander.open:
+            return
 
-    with st.expander(title, expanded=False):
         # Invoice summary
         col1, col2 = st.columns(2)
-        
         with col1:
-            doc_label = {
-                "NFe": "Electronic Invoice",
-                "NFCe": "Consumer Invoice",
-                "CTe": "Transport Knowledge",
-                "MDFe": "Manifest of Documents"
-            }.get(invoice.document_type, invoice.document_type)
-            
-            st.markdown(f"""
-            **Type:** {doc_label}  
-            **Number:** {invoice.document_number}/{invoice.series}  
-            **Key:** `{invoice.document_key}`  
-            **Date:** {invoice.issue_date.strftime("%d/%m/%Y %H:%M")}
-            """)
-        
+            st.markdown(details["summary"])
         with col2:
-            # Show different info based on document type
-            if invoice.document_type in ["CTe", "MDFe"]:
-                st.markdown(f"""
-                **Carrier:** {invoice.issuer_name}  
-                **CNPJ:** {invoice.issuer_cnpj}  
-                **Origin:** {invoice.issuer_uf or "N/A"}  
-                **Destination:** {invoice.recipient_uf or "N/A"}
-                """)
-            else:
-                st.markdown(f"""
-                **Issuer:** {invoice.issuer_name}  
-                **CNPJ:** {invoice.issuer_cnpj}  
-                **Recipient:** {invoice.recipient_name or "N/A"}  
-                """)
+            st.markdown(details["parties"])
 
         # Financial info (skip for MDFe which has no values)
-        if invoice.document_type != "MDFe":
+        if result["document_type"] != "MDFe":
             st.markdown("### 💰 Values")
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                label = "Service" if invoice.document_type == "CTe" else "Products"
-                st.metric(label, f"R$ {invoice.total_products:,.2f}")
+                label = "Service" if result["document_type"] == "CTe" else "Products"
+                st.metric(label, f"R$ {result['total_products']:,.2f}")
             with col2:
-                st.metric("Taxes", f"R$ {invoice.total_taxes:,.2f}")
+                st.metric("Taxes", f"R$ {result['total_taxes']:,.2f}")
             with col3:
-                st.metric("Total", f"R$ {invoice.total_invoice:,.2f}")
+                st.metric("Total", f"R$ {result['total_invoice']:,.2f}")
         else:
             st.info("📋 **Manifest:** Control document (no monetary values)", icon="ℹ️")
 
         # Classification
-        if classification:
+        if details["classification"]:
             st.markdown("### 🏷️ Automatic Classification")
-            st.success(format_classification(classification))
+            st.success(details["classification"])
+
+        # Items (Arrow-backed grid instead of a markdown table)
+        items = result["items"]
+        if items is not None:
+            st.markdown(f"### 📦 Items ({len(items)})")
+            st.dataframe(
+                items,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "Valor Unit.": st.column_config.NumberColumn(format="R$ %.2f"),
+                    "Total": st.column_config.NumberColumn(format="R$ %.2f"),
+                },
+            )
 
         # Validation issues
-        if issues:
+        if details["issues"]:
             st.markdown("### ⚠️ Validation Issues")
-            st.warning(format_validation_issues(issues))
+            st.warning(details["issues"])
         else:
             st.success("✅ No validation issues found!")
 
@@ -441,7 +505,7 @@ def _render_success_result(result: dict):
 def _show_active_jobs():
     """Show list of all active jobs in session."""
     
-    processor = AsyncProcessor()
+    processor = get_session_processor()
     all_jobs = processor.get_all_jobs()
     
     if not all_jobs:
@@ -450,19 +514,32 @@ def _show_active_jobs():
     st.divider()
     st.subheader("📋 Active Jobs")
     
-    for job_id, job in all_jobs.items():
-        with st.expander(
-            f"Job {job_id[:8]}... - {job['status'].upper()} "
-            f"({job['processed']}/{job['total']})",
-            expanded=False
-        ):
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric("Status", job['status'])
-            with col2:
-                st.metric("Progress", f"{job['processed']}/{job['total']}")
-            with col3:
-                if st.button("📊 View Details", key=f"view_{job_id}"):
-                    st.session_state.current_job_id = job_id
-                    st.rerun()
+    # One table plus a selector instead of an expander, metrics and a
+    # button per job
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "job": f"{job_id[:8]}...",
+                    "status": job["status"],
+                    "progress": f"{job['processed']}/{job['total']}",
+                }
+                for job_id, job in all_jobs.items()
+            ]
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        selected = st.selectbox(
+            "View job",
+            list(all_jobs),
+            format_func=lambda job_id: f"Job {job_id[:8]}... - {all_jobs[job_id]['status'].upper()}",
+            key="active_job_select",
+        )
+    with col2:
+        if st.button("📊 View Details", key="view_active_job", use_container_width=True):
+            st.session_state.current_job_id = selected
+            st.rerun()
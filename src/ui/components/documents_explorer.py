@@ -3,15 +3,16 @@
 from __future__ import annotations
 
 from datetime import datetime
+import gzip
 import io
-import csv
 import logging
-from typing import Dict, List, Optional
+import tempfile
+from typing import Dict, Iterator, List, Optional
 
 import pandas as pd
 import streamlit as st
 
-from src.database.db import DatabaseManager, InvoiceDB
+from src.database.db import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
@@ -25,87 +26,110 @@ DATE_PRESETS = [
     "Custom",
 ]
 
+OPERATION_LABELS = {
+    "purchase": "📥 purchase",
+    "sale": "📤 sale",
+    "transfer": "🔄 transfer",
+    "return": "↩️ return",
+}
+
 
 def _filters_ui() -> Dict:
     """Render filters and return a dict for DB queries."""
     st.subheader("🔍 Filters", divider=True)
     st.caption("Fast filtering, server-side pagination, selection and export")
-    # Global text search (issuer/recipient names, item descriptions)
-    q = st.text_input(
-        "Full-text search (issuer/recipient/items)",
-        placeholder="e.g., supplier name, item description, or keywords",
-        key="explorer_q",
-    )
+    # Widgets live in a form so typing in the text fields does not rerun the
+    # queries on every keystroke; filters apply when the form is submitted.
+    with st.form("explorer_filters", border=False):
+        # Global text search (issuer/recipient names, item descriptions)
+        q = st.text_input(
+            "Full-text search (issuer/recipient/items)",
+            placeholder="e.g., supplier name, item description, or keywords",
+            key="explorer_q",
+        )
 
-    col1, col2, col3, col4 = st.columns(4)
+        col1, col2, col3, col4 = st.columns(4)
 
-    with col1:
-        doc_type = st.selectbox(
-            "Document Type",
-            options=["All", "NFe", "NFCe", "CTe", "MDFe"],
-            key="explorer_type",
-        )
+        with col1:
+            doc_type = st.selectbox(
+                "Document Type",
+                options=["All", "NFe", "NFCe", "CTe", "MDFe"],
+                key="explorer_type",
+            )
 
-    with col2:
-        operation = st.selectbox(
-            "Operation Type",
-            options=["All", "Purchase", "Sale", "Transfer", "Return"],
-            key="explorer_operation",
-        )
+        with col2:
+            operation = st.selectbox(
+                "Operation Type",
+                options=["All", "Purchase", "Sale", "Transfer", "Return"],
+                key="explorer_operation",
+            )
 
-    with col3:
-        issuer = st.text_input(
-            "Issuer CNPJ (contains)",
-            placeholder="00.000.000/0000-00",
-            key="explorer_issuer",
-        )
+        with col3:
+            issuer = st.text_input(
+                "Issuer CNPJ (contains)",
+                placeholder="00.000.000/0000-00",
+                key="explorer_issuer",
+            )
 
-    with col4:
-        recipient = st.text_input(
-            "Recipient CNPJ/CPF (contains)",
-            placeholder="000.000.000-00",
-            key="explorer_recipient",
-        )
+        with col4:
+            recipient = st.text_input(
+                "Recipient CNPJ/CPF (contains)",
+                placeholder="000.000.000-00",
+                key="explorer_recipient",
+            )
 
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        modal = st.selectbox(
-            "Modal",
-            options=["All", "1", "2", "3", "4", "5", "Other"],
-            help="CTe/MDFe modal (1=Rodoviário, 2=Aéreo, 3=Aquaviário, 4=Ferroviário, 5=Dutoviário)",
-            key="explorer_modal",
-        )
-    with col2:
-        cost_center = st.text_input(
-            "Cost Center (exact)",
-            placeholder="CC001",
-            key="explorer_cost_center",
-        )
-    with col3:
-        min_conf = st.slider(
-            "Min Confidence",
-            min_value=0.0,
-            max_value=1.0,
-            value=0.0,
-            step=0.05,
-            key="explorer_min_conf",
-        )
-    with col4:
-        date_preset = st.selectbox(
-            "Date Range",
-            options=DATE_PRESETS,
-            index=0,
-            key="explorer_date_preset",
-        )
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            modal = st.selectbox(
+                "Modal",
+                options=["All", "1", "2", "3", "4", "5", "Other"],
+                help="CTe/MDFe modal (1=Rodoviário, 2=Aéreo, 3=Aquaviário, 4=Ferroviário, 5=Dutoviário)",
+                key="explorer_modal",
+            )
+        with col2:
+            cost_center = st.text_input(
+                "Cost Center (exact)",
+                placeholder="CC001",
+                key="explorer_cost_center",
+            )
+        with col3:
+            min_conf = st.slider(
+                "Min Confidence",
+                min_value=0.0,
+                max_value=1.0,
+                value=0.0,
+                step=0.05,
+                key="explorer_min_conf",
+            )
+        with col4:
+            date_preset = st.selectbox(
+                "Date Range",
+                options=DATE_PRESETS,
+                index=0,
+                key="explorer_date_preset",
+            )
 
-    start_date = None
-    end_date = None
-    if date_preset == "Custom":
+        # Always rendered: widgets inside a form only change on submit, so
+        # showing them only for "Custom" would take two submits to use them.
+        # Their values are ignored for the other presets.
         c1, c2 = st.columns(2)
         with c1:
-            start_date = st.date_input("Start Date", value=None, key="explorer_start")
+            start_date = st.date_input(
+                "Start Date",
+                value=None,
+                help="Used when Date Range is Custom",
+                key="explorer_start",
+            )
         with c2:
-            end_date = st.date_input("End Date", value=None, key="explorer_end")
+            end_date = st.date_input(
+                "End Date",
+                value=None,
+                help="Used when Date Range is Custom",
+                key="explorer_end",
+            )
+
+        if st.form_submit_button("🔍 Apply filters"):
+            st.session_state.explorer_page = 1
 
     filters: Dict = {}
     if q:
@@ -142,49 +166,212 @@ def _filters_ui() -> Dict:
     return filters
 
 
-def _to_rows(invoices: List[InvoiceDB]) -> pd.DataFrame:
-    rows = []
-    for inv in invoices:
-        total_invoice = float(inv.total_invoice) if inv.total_invoice else 0.0
-        operation_display = (
-            {
-                "purchase": "📥 purchase",
-                "sale": "📤 sale",
-                "transfer": "🔄 transfer",
-                "return": "↩️ return",
-            }.get(inv.operation_type, "📄 not classified")
-            if inv.operation_type
-            else "❓ not classified"
-        )
-        rows.append(
-            {
-                "Select": False,
-                "Date": inv.issue_date.strftime("%Y-%m-%d %H:%M") if inv.issue_date else "N/A",
-                "Type": inv.document_type,
-                "Operation": operation_display,
-                "Number": inv.document_number,
-                "Issuer": inv.issuer_name,
-                "CNPJ": inv.issuer_cnpj,
-                "Recipient": inv.recipient_name or "",
-                "Recipient Doc": inv.recipient_cnpj_cpf or "",
-                "Modal": inv.modal or "",
-                "Cost Center": inv.cost_center or "",
-                "Confidence": inv.classification_confidence if inv.classification_confidence is not None else "",
-                "Items": len(inv.items) if inv.items else 0,
-                "Total": total_invoice,
-                "Key": inv.document_key,
-            }
-        )
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df = df[[
-            "Select", "Date", "Type", "Operation", "Number", "Issuer", "CNPJ",
-            "Recipient", "Recipient Doc", "Modal", "Cost Center", "Confidence",
-            "Items", "Total", "Key",
-        ]]
+def _to_rows(invoices: List) -> pd.DataFrame:
+    """
+    Build the page table column-wise and format it with vectorized pandas ops.
+
+    Args:
+        invoices: Summary rows from DatabaseManager.search_invoices_summary()
+    """
+    if not invoices:
+        return pd.DataFrame()
+
+    df = pd.DataFrame({
+        "Select": False,
+        "Date": [inv.issue_date for inv in invoices],
+        "Type": [inv.document_type for inv in invoices],
+        "Operation": [inv.operation_type for inv in invoices],
+        "Number": [inv.document_number for inv in invoices],
+        "Issuer": [inv.issuer_name for inv in invoices],
+        "CNPJ": [inv.issuer_cnpj for inv in invoices],
+        "Recipient": [inv.recipient_name for inv in invoices],
+        "Recipient Doc": [inv.recipient_cnpj_cpf for inv in invoices],
+        "Modal": [inv.modal for inv in invoices],
+        "Cost Center": [inv.cost_center for inv in invoices],
+        "Confidence": [inv.classification_confidence for inv in invoices],
+        "Items": [inv.items_count for inv in invoices],
+        "Total": [inv.total_invoice for inv in invoices],
+        "Key": [inv.document_key for inv in invoices],
+    })
+
+    df["Date"] = pd.to_datetime(df["Date"]).dt.strftime("%Y-%m-%d %H:%M").fillna("N/A")
+
+    operation = df["Operation"].fillna("")
+    df["Operation"] = (
+        operation.map(OPERATION_LABELS)
+        .fillna("📄 not classified")
+        .where(operation != "", "❓ not classified")
+    )
+
+    text_columns = ["Recipient", "Recipient Doc", "Modal", "Cost Center"]
+    df[text_columns] = df[text_columns].fillna("").astype(str)
+    df["Confidence"] = df["Confidence"].astype(object).where(df["Confidence"].notna(), "")
+    df["Total"] = pd.to_numeric(df["Total"], errors="coerce").fillna(0.0).astype(float)
     return df
 
 
+def _export_frame(invoices: List, items: Optional[List[int]] = None) -> pd.DataFrame:
+    """
+    Build the export columns for one batch, converting numbers column-wise.
+
+    Args:
+        invoices: Summary rows or ORM invoices
+        items: Item count per invoice (defaults to the rows' ``items_count``)
+
+    Returns:
+        DataFrame with numeric Confidence/Total columns (NaN when missing)
+    """
+    df = pd.DataFrame({
+        "Date": [inv.issue_date.isoformat() if inv.issue_date else "" for inv in invoices],
+        "Type": [inv.document_type for inv in invoices],
+        "Operation": [inv.operation_type for inv in invoices],
+        "Number": [inv.document_number for inv in invoices],
+        "Issuer": [inv.issuer_name for inv in invoices],
+        "CNPJ": [inv.issuer_cnpj for inv in invoices],
+        "Recipient": [inv.recipient_name for inv in invoices],
+        "Recipient Doc": [inv.recipient_cnpj_cpf for inv in invoices],
+        "Modal": [inv.modal for inv in invoices],
+        "Cost Center": [inv.cost_center for inv in invoices],
+        "Confidence": [inv.classification_confidence for inv in invoices],
+        "Items": items if items is not None else [inv.items_count for inv in invoices],
+        "Total": [inv.total_invoice for inv in invoices],
+        "Key": [inv.document_key for inv in invoices],
+    })
+
+    text_columns = [
+        "Type", "Operation", "Number", "Issuer", "CNPJ", "Recipient",
+        "Recipient Doc", "Modal", "Cost Center", "Key",
+    ]
+    df[text_columns] = df[text_columns].fillna("").astype(str)
+    df["Confidence"] = pd.to_numeric(df["Confidence"], errors="coerce")
+    df["Total"] = pd.to_numeric(df["Total"], errors="coerce").fillna(0.0)
+    return df
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _count_invoices_cached(_db: DatabaseManager, database_url: str, data_version: int, filter_items: tuple) -> int:
+    """
+    Count filtered invoices, cached per database, data version and filters.
+
+    Args:
+        _db: DatabaseManager (not hashed)
+        database_url: Database URL (cache key)
+        data_version: db.data_version, so writes invalidate the cached count
+        filter_items: Sorted filter items (cache key)
+
+    Returns:
+        Number of matching invoices
+    """
+    return _db.count_invoices(**dict(filter_items))
+
+
+def _iter_batches(
+    db: DatabaseManager, filters: Dict, batch_size: int, summary: bool = False
+) -> Iterator[List]:
+    """
+    Yield all filtered invoices in batches using keyset pagination.
+
+    With ``summary=True`` batches hold summary rows (no item objects, an
+    ``items_count`` column) instead of ORM invoices with items loaded.
+    """
+    after_key = None
+    while True:
+        if summary:
+            batch = db.search_invoices_summary(limit=batch_size, after_key=after_key, **filters)
+        else:
+            batch = db.search_invoices(
+                limit=batch_size, after_key=after_key, load_issues=False, **filters
+            )
+        if not batch:
+            return
+        yield batch
+        if len(batch) < batch_size:
+            return
+        after_key = (batch[-1].issue_date, batch[-1].id)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _load_page(
+    _db: DatabaseManager,
+    database_url: str,
+    data_version: int,
+    filter_items: tuple,
+    page_size: int,
+    after_key: Optional[tuple],
+) -> tuple[pd.DataFrame, Optional[tuple]]:
+    """
+    Query one page and convert it to a plain DataFrame (cacheable, no ORM objects).
+
+    Returns:
+        Tuple of (page rows, ``(issue_date, id)`` of the last row or None)
+    """
+    invoices = _db.search_invoices_summary(limit=page_size, after_key=after_key, **dict(filter_items))
+    last_key = (invoices[-1].issue_date, invoices[-1].id) if invoices else None
+    return _to_rows(invoices), last_key
+
+
+def _fetch_page(db: DatabaseManager, filters: Dict, page: int, page_size: int) -> pd.DataFrame:
+    """
+    Fetch one page, seeking from the previous page's last row.
+
+    Cursors (the ``(issue_date, id)`` of each page's last row) are kept in
+    session state per database, data version and filter/page-size
+    combination, so writes discard boundaries computed on older data.
+    Sequential navigation reuses the cursor recorded by the previous page;
+    direct jumps (Go to page, Last) look the cursor up with
+    get_page_boundary_key(), which walks only (issue_date, id) instead of
+    reading full rows at an OFFSET. Pages are cached until the data
+    changes, so revisiting one does not query the database.
+    """
+    filter_items = tuple(sorted(filters.items()))
+    signature = (db.database_url, db.data_version, filter_items, page_size)
+    if st.session_state.get("explorer_cursor_sig") != signature:
+        st.session_state.explorer_cursor_sig = signature
+        st.session_state.explorer_cursors = {}
+    cursors = st.session_state.explorer_cursors
+
+    after_key = cursors.get(page)
+    if after_key is None and page > 1:
+        after_key = db.get_page_boundary_key(page_size, page, **filters)
+        if after_key is None:
+            return pd.DataFrame()
+        cursors[page] = after_key
+
+    df, last_key = _load_page(
+        db, db.database_url, db.data_version, filter_items, page_size, after_key
+    )
+
+    if last_key is not None:
+        cursors[page + 1] = last_key
+    return df
+
+
+def _total_documents(db: DatabaseManager, filter_items: tuple) -> int:
+    """
+    Return the filtered document count, remembered in session state.
+
+    Page navigation keeps the same filters and data version, so it reuses
+    the stored total instead of going back to the count query.
+    """
+    signature = (db.database_url, db.data_version, filter_items)
+    if st.session_state.get("explorer_total_sig") != signature:
+        st.session_state.explorer_total = _count_invoices_cached(
+            db, db.database_url, db.data_version, filter_items
+        )
+        st.session_state.explorer_total_sig = signature
+    return st.session_state.explorer_total
+
+
+def _go_to_page(page: int) -> None:
+    """Navigation button callback: switch page before the next run starts."""
+    st.session_state.explorer_page = page
+
+
+def _on_page_jump() -> None:
+    """Apply the "Go to page" value."""
+    st.session_state.explorer_page = st.session_state.explorer_page_jump
+
+
 def render_documents_explorer(db: DatabaseManager) -> None:
     # Filters
     filters = _filters_ui()
@@ -198,8 +385,10 @@ def render_documents_explorer(db: DatabaseManager) -> None:
         st.session_state.explorer_page = 1
 
     # Count total efficiently
-    total_documents = db.count_invoices(**filters)
+    total_documents = _total_documents(db, tuple(sorted(filters.items())))
     total_pages = max(1, (total_documents + page_size - 1) // page_size)
+    # Filters may have shrunk the result set below the current page
+    st.session_state.explorer_page = min(st.session_state.explorer_page, total_pages)
     st.caption(f"Total: {total_documents} documents · Page {st.session_state.explorer_page}/{total_pages}")
 
     # Export all filtered (streaming to temp file)
@@ -219,41 +408,19 @@ def render_documents_explorer(db: DatabaseManager) -> None:
             disabled=export_disabled,
             key="explorer_export_all_btn",
         ):
-            import tempfile, gzip
-            from io import TextIOWrapper
             with st.spinner(f"Building {fmt} for all filtered documents..."):
-                # Common header
-                header = [
-                    "Date","Type","Operation","Number","Issuer","CNPJ","Recipient","Recipient Doc",
-                    "Modal","Cost Center","Confidence","Items","Total","Key",
-                ]
                 batch_size = 1000
                 if fmt == "CSV":
                     tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".csv")
                     with open(tmp.name, "w", encoding="utf-8", newline="") as f:
-                        w = csv.writer(f)
-                        w.writerow(header)
-                        for ofs in range(0, total_documents, batch_size):
-                            batch = db.search_invoices(limit=batch_size, offset=ofs, **filters)
-                            for inv in batch:
-                                total_invoice = float(inv.total_invoice) if inv.total_invoice else 0.0
-                                op = inv.operation_type or ""
-                                w.writerow([
-                                    inv.issue_date.isoformat() if inv.issue_date else "",
-                                    inv.document_type or "",
-                                    op,
-                                    inv.document_number or "",
-                                    inv.issuer_name or "",
-                                    inv.issuer_cnpj or "",
-                                    inv.recipient_name or "",
-                                    inv.recipient_cnpj_cpf or "",
-                                    inv.modal or "",
-                                    inv.cost_center or "",
-                                    f"{inv.classification_confidence:.2f}" if inv.classification_confidence is not None else "",
-                                    len(inv.items) if inv.items else 0,
-                                    f"{total_invoice:.2f}",
-                                    inv.document_key or "",
-                                ])
+                        first = True
+                        for batch in _iter_batches(db, filters, batch_size, summary=True):
+                            _export_frame(batch).to_csv(
+                                f, header=first, index=False, float_format="%.2f", lineterminator="\r\n"
+                            )
+                            first = False
+                        if first:  # No rows: still write the header
+                            _export_frame([]).to_csv(f, index=False, lineterminator="\r\n")
                     st.download_button(
                         "Download CSV",
                         data=open(tmp.name, "rb"),
@@ -264,29 +431,14 @@ def render_documents_explorer(db: DatabaseManager) -> None:
                 elif fmt == "CSV (gzip)":
                     tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".csv.gz")
                     with gzip.open(tmp.name, mode="wt", encoding="utf-8", newline="") as gz:
-                        w = csv.writer(gz)
-                        w.writerow(header)
-                        for ofs in range(0, total_documents, batch_size):
-                            batch = db.search_invoices(limit=batch_size, offset=ofs, **filters)
-                            for inv in batch:
-                                total_invoice = float(inv.total_invoice) if inv.total_invoice else 0.0
-                                op = inv.operation_type or ""
-                                w.writerow([
-                                    inv.issue_date.isoformat() if inv.issue_date else "",
-                                    inv.document_type or "",
-                                    op,
-                                    inv.document_number or "",
-                                    inv.issuer_name or "",
-                                    inv.issuer_cnpj or "",
-                                    inv.recipient_name or "",
-                                    inv.recipient_cnpj_cpf or "",
-                                    inv.modal or "",
-                                    inv.cost_center or "",
-                                    f"{inv.classification_confidence:.2f}" if inv.classification_confidence is not None else "",
-                                    len(inv.items) if inv.items else 0,
-                                    f"{total_invoice:.2f}",
-                                    inv.document_key or "",
-                                ])
+                        first = True
+                        for batch in _iter_batches(db, filters, batch_size, summary=True):
+                            _export_frame(batch).to_csv(
+                                gz, header=first, index=False, float_format="%.2f", lineterminator="\r\n"
+                            )
+                            first = False
+                        if first:  # No rows: still write the header
+                            _export_frame([]).to_csv(gz, index=False, lineterminator="\r\n")
                     st.download_button(
                         "Download CSV (gzip)",
                         data=open(tmp.name, "rb"),
@@ -297,29 +449,14 @@ def render_documents_explorer(db: DatabaseManager) -> None:
                 elif fmt == "Excel":
                     with st.spinner("Building Excel workbook for all filtered documents..."):
                         # Build datasets in chunks
-                        invoices_rows = []
+                        invoice_frames = []
                         items_rows = []
                         batch_size = 1000
-                        for ofs in range(0, total_documents, batch_size):
-                            batch = db.search_invoices(limit=batch_size, offset=ofs, **filters)
+                        for batch in _iter_batches(db, filters, batch_size):
+                            invoice_frames.append(
+                                _export_frame(batch, items=[len(inv.items or []) for inv in batch])
+                            )
                             for inv in batch:
-                                total_invoice = float(inv.total_invoice) if inv.total_invoice else 0.0
-                                invoices_rows.append({
-                                    "Date": inv.issue_date.isoformat() if inv.issue_date else "",
-                                    "Type": inv.document_type or "",
-                                    "Operation": inv.operation_type or "",
-                                    "Number": inv.document_number or "",
-                                    "Issuer": inv.issuer_name or "",
-                                    "CNPJ": inv.issuer_cnpj or "",
-                                    "Recipient": inv.recipient_name or "",
-                                    "Recipient Doc": inv.recipient_cnpj_cpf or "",
-                                    "Modal": inv.modal or "",
-                                    "Cost Center": inv.cost_center or "",
-                                    "Confidence": f"{inv.classification_confidence:.2f}" if inv.classification_confidence is not None else "",
-                                    "Items": len(inv.items) if inv.items else 0,
-                                    "Total": f"{total_invoice:.2f}",
-                                    "Key": inv.document_key or "",
-                                })
                                 for it_idx, it in enumerate(inv.items or []):
                                     items_rows.append({
                                         "Invoice Key": inv.document_key or "",
@@ -329,22 +466,29 @@ def render_documents_explorer(db: DatabaseManager) -> None:
                                         "NCM": it.ncm or "",
                                         "CFOP": it.cfop or "",
                                         "Unit": it.unit or "",
-                                        "Quantity": float(it.quantity) if it.quantity else 0.0,
-                                        "Unit Price": float(it.unit_price) if it.unit_price else 0.0,
-                                        "Total Price": float(it.total_price) if it.total_price else 0.0,
-                                        "ICMS": float(it.tax_icms) if it.tax_icms else 0.0,
-                                        "IPI": float(it.tax_ipi) if it.tax_ipi else 0.0,
-                                        "PIS": float(it.tax_pis) if it.tax_pis else 0.0,
-                                        "COFINS": float(it.tax_cofins) if it.tax_cofins else 0.0,
-                                        "ISSQN": float(it.tax_issqn) if it.tax_issqn else 0.0,
+                                        "Quantity": it.quantity,
+                                        "Unit Price": it.unit_price,
+                                        "Total Price": it.total_price,
+                                        "ICMS": it.tax_icms,
+                                        "IPI": it.tax_ipi,
+                                        "PIS": it.tax_pis,
+                                        "COFINS": it.tax_cofins,
+                                        "ISSQN": it.tax_issqn,
                                     })
 
-                        inv_df = pd.DataFrame(invoices_rows)
+                        inv_df = pd.concat(invoice_frames, ignore_index=True) if invoice_frames else pd.DataFrame()
                         items_df = pd.DataFrame(items_rows)
+                        if not items_df.empty:
+                            numeric_columns = [
+                                "Quantity", "Unit Price", "Total Price",
+                                "ICMS", "IPI", "PIS", "COFINS", "ISSQN",
+                            ]
+                            items_df[numeric_columns] = (
+                                items_df[numeric_columns].apply(pd.to_numeric, errors="coerce").fillna(0.0)
+                            )
 
                         # Write to Excel with formatting
-                        import io as _io
-                        buffer = _io.BytesIO()
+                        buffer = io.BytesIO()
                         
                         # Try xlsxwriter first (richer formatting), fallback to openpyxl
                         engine = "openpyxl"  # Default fallback
@@ -447,28 +591,8 @@ def render_documents_explorer(db: DatabaseManager) -> None:
                         tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".parquet")
                         writer = None
                         try:
-                            for ofs in range(0, total_documents, batch_size):
-                                batch = db.search_invoices(limit=batch_size, offset=ofs, **filters)
-                                rows = []
-                                for inv in batch:
-                                    total_invoice = float(inv.total_invoice) if inv.total_invoice else 0.0
-                                    rows.append({
-                                        "Date": inv.issue_date.isoformat() if inv.issue_date else "",
-                                        "Type": inv.document_type or "",
-                                        "Operation": inv.operation_type or "",
-                                        "Number": inv.document_number or "",
-                                        "Issuer": inv.issuer_name or "",
-                                        "CNPJ": inv.issuer_cnpj or "",
-                                        "Recipient": inv.recipient_name or "",
-                                        "Recipient Doc": inv.recipient_cnpj_cpf or "",
-                                        "Modal": inv.modal or "",
-                                        "Cost Center": inv.cost_center or "",
-                                        "Confidence": inv.classification_confidence if inv.classification_confidence is not None else None,
-                                        "Items": len(inv.items) if inv.items else 0,
-                                        "Total": total_invoice,
-                                        "Key": inv.document_key or "",
-                                    })
-                                df_chunk = pd.DataFrame(rows)
+                            for batch in _iter_batches(db, filters, batch_size, summary=True):
+                                df_chunk = _export_frame(batch)
                                 table = pa.Table.from_pandas(df_chunk, preserve_index=False)
                                 if writer is None:
                                     writer = pq.ParquetWriter(tmp.name, table.schema)
@@ -485,11 +609,8 @@ def render_documents_explorer(db: DatabaseManager) -> None:
                         )
 
     # Fetch current page
-    offset = (st.session_state.explorer_page - 1) * page_size
-    invoices = db.search_invoices(limit=page_size, offset=offset, **filters)
-
     # Dataframe with selection
-    df = _to_rows(invoices)
+    df = _fetch_page(db, filters, st.session_state.explorer_page, page_size)
     if df.empty:
         st.info("No documents found for the current filters.")
         return
@@ -522,13 +643,12 @@ def render_documents_explorer(db: DatabaseManager) -> None:
     with c1:
         st.write(f"Selected: {len(selected_keys)}")
     with c2:
-        # Export selected as CSV
+        # Export selected as CSV (serialized only when the download is clicked)
         if selected_keys:
             export_df = edited_df[edited_df["Select"] == True].drop(columns=["Select"])  # type: ignore
-            csv_data = export_df.to_csv(index=False).encode("utf-8")
             st.download_button(
                 "⬇️ Export selected (CSV)",
-                data=csv_data,
+                data=lambda: export_df.to_csv(index=False).encode("utf-8"),
                 file_name="documents_export.csv",
                 mime="text/csv",
                 key="explorer_export_csv",
@@ -544,35 +664,31 @@ def render_documents_explorer(db: DatabaseManager) -> None:
                     logger.warning(f"Failed to delete invoice {key}: {e}")
             st.success(f"Deleted {deleted} documents")
             st.session_state.explorer_select_all = False
+            st.session_state.explorer_cursors = {}  # Page boundaries moved
             st.rerun()
 
     # Pagination nav
     st.divider()
     c1, c2, c3, c4, c5 = st.columns([1, 1, 2, 1, 1])
+    # Buttons switch pages in on_click callbacks, so a click costs one run
+    # instead of a run with the old page followed by st.rerun().
+    page = st.session_state.explorer_page
     with c1:
-        if st.button("⏮️ First", disabled=(st.session_state.explorer_page == 1)):
-            st.session_state.explorer_page = 1
-            st.rerun()
+        st.button("⏮️ First", disabled=(page == 1), on_click=_go_to_page, args=(1,))
     with c2:
-        if st.button("◀️ Previous", disabled=(st.session_state.explorer_page == 1)):
-            st.session_state.explorer_page -= 1
-            st.rerun()
+        st.button("◀️ Previous", disabled=(page == 1), on_click=_go_to_page, args=(page - 1,))
     with c3:
-        new_page = st.number_input(
+        # Keep the widget in sync with button navigation; a jump typed by the
+        # user is applied by the callback before the next run starts.
+        st.session_state.explorer_page_jump = page
+        st.number_input(
             "Go to page",
             min_value=1,
             max_value=total_pages,
-            value=st.session_state.explorer_page,
             key="explorer_page_jump",
+            on_change=_on_page_jump,
         )
-        if new_page != st.session_state.explorer_page:
-            st.session_state.explorer_page = new_page
-            st.rerun()
     with c4:
-        if st.button("▶️ Next", disabled=(st.session_state.explorer_page >= total_pages)):
-            st.session_state.explorer_page += 1
-            st.rerun()
+        st.button("▶️ Next", disabled=(page >= total_pages), on_click=_go_to_page, args=(page + 1,))
     with c5:
-        if st.button("⏭️ Last", disabled=(st.session_state.explorer_page >= total_pages)):
-            st.session_state.explorer_page = total_pages
-            st.rerun()
+        st.button("⏭️ Last", disabled=(page >= total_pages), on_click=_go_to_page, args=(total_pages,))
@@ -5,16 +5,35 @@ Uses placeholders and auto-update instead of full st.rerun().
 
 import logging
 import time
-from datetime import datetime
 
 import streamlit as st
 
-from src.ui.async_processor import AsyncProcessor
+from src.ui.async_processor import get_session_processor
 
 logger = logging.getLogger(__name__)
 
 
-def render_live_progress(job_id: str, placeholder):
+def progress_metrics_markdown(job: dict) -> str:
+    """
+    Format a job's progress counters as a one-row markdown table.
+
+    Args:
+        job: Job status dict from AsyncProcessor
+
+    Returns:
+        Markdown table with discovered, parsed, validated, saved,
+        processed and failed counts
+    """
+    return (
+        "| 📋 Discovered | 🧩 Parsed | ✅ Validated | 💾 Saved | ⚙️ Processed | ❌ Failures |\n"
+        "|---:|---:|---:|---:|---:|---:|\n"
+        f"| {job.get('discovered', job['total'])} | {job.get('parsed', 0)} "
+        f"| {job.get('validated', 0)} | {job.get('saved', 0)} "
+        f"| {job['processed']} | {job['failed']} |"
+    )
+
+
+def render_live_progress(job_id: str, placeholder, status_box=None):
     """
     Renders real-time progress using placeholder.
     Does not reload the entire page, only updates the component.
@@ -22,11 +41,14 @@ def render_live_progress(job_id: str, placeholder):
     Args:
         job_id: Job ID
         placeholder: st.empty() placeholder for updating
+        status_box: Optional st.status container; its label carries the saved
+            count and its state is set when the job finishes
     """
-    processor = AsyncProcessor()
+    processor = get_session_processor()
     
     max_iterations = 180  # ~3 min com sleep de 1s
     iteration = 0
+    last_label = None
     
     while iteration < max_iterations:
         job = processor.get_job_status(job_id)
@@ -42,27 +64,23 @@ def render_live_progress(job_id: str, placeholder):
         with placeholder.container():
             # Use 'saved' as main progress to reflect DB persistence
             progress = job.get("saved", 0) / job["total"] if job["total"] > 0 else 0
-            st.progress(progress, text=f"{job.get('saved', 0)}/{job['total']} saved to database")
-            
-            # Extended metrics grid
-            col1, col2, col3, col4, col5, col6 = st.columns(6)
+            progress_text = f"{job.get('saved', 0)}/{job['total']} saved to database"
+            if status_box is None:
+                st.progress(progress, text=progress_text)
+            else:
+                st.progress(progress)
+                # Only send a label update when the count actually changed
+                label = f"⏳ Processing: {progress_text}"
+                if status == "processing" and label != last_label:
+                    status_box.update(label=label)
+                    last_label = label
             
-            with col1:
-                st.metric("📋 Discovered", job.get("discovered", job["total"]))
-            with col2:
-                st.metric("🧩 Parsed", job.get("parsed", 0))
-            with col3:
-                st.metric("✅ Validated", job.get("validated", 0))
-            with col4:
-                st.metric("💾 Saved", job.get("saved", 0))
-            with col5:
-                st.metric("⚙️ Processed", job["processed"])
-            with col6:
-                st.metric("❌ Failures", job["failed"])
+            # Extended metrics (one table element instead of six metrics)
+            st.markdown(progress_metrics_markdown(job))
             
             # Time estimate
             if status == "processing":
-                elapsed = (datetime.now() - job["started_at"]).total_seconds()
+                elapsed = time.monotonic() - job["started_monotonic"]
                 avg_time = elapsed / job["processed"] if job["processed"] > 0 else 2
                 remaining = (job["total"] - job["processed"]) * avg_time
                 st.caption(f"⏱️ Estimated time remaining: ~{remaining:.0f}s")
@@ -75,7 +93,13 @@ def render_live_progress(job_id: str, placeholder):
                 break
     
     # Retornar status final
-    return processor.get_job_status(job_id)
+    final_status = processor.get_job_status(job_id)
+    if status_box is not None and final_status:
+        if final_status["status"] == "completed":
+            status_box.update(label="✅ Processing completed!", state="complete", expanded=False)
+        elif final_status["status"] != "processing":
+            status_box.update(label=f"⚠️ Processing {final_status['status']}", state="error")
+    return final_status
 
 
 def create_progress_monitor(job_id: str):
@@ -89,12 +113,15 @@ def create_progress_monitor(job_id: str):
     Returns:
         dict with final job status
     """
-    st.info("⏳ **Processing underway**. You can freely navigate to other tabs.", icon="ℹ️")
-    
-    # Create placeholder for updates
-    progress_placeholder = st.empty()
+    # One status container: its label shows the progress count, the
+    # placeholder inside holds the bar and metrics
+    status_box = st.status(
+        "⏳ **Processing underway**. You can freely navigate to other tabs.", expanded=True
+    )
+    with status_box:
+        progress_placeholder = st.empty()
     
     # Monitor progress
-    final_status = render_live_progress(job_id, progress_placeholder)
+    final_status = render_live_progress(job_id, progress_placeholder, status_box)
     
     return final_status
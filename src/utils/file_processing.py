@@ -2,8 +2,11 @@
 
 import logging
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from typing import List, Optional, Tuple
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+import pandas as pd
 
 from src.database.db import DatabaseManager
 from src.models import InvoiceModel
@@ -14,9 +17,51 @@ from src.tools.xml_parser import XMLParserTool
 logger = logging.getLogger(__name__)
 
 
+def file_suffix(filename: str) -> str:
+    """
+    Return the lowercase extension of a file name without the dot.
+
+    Computed once per name so callers compare against "xml"/"zip" instead
+    of lowercasing the whole name for every ``endswith`` check.
+
+    Args:
+        filename: File or ZIP member name
+
+    Returns:
+        Extension such as "xml" or "zip" ("" when the name has none)
+    """
+    base, dot, suffix = filename.rpartition(".")
+    return suffix.lower() if dot else ""
+
+
+def is_xml_member(file_info: zipfile.ZipInfo) -> bool:
+    """
+    Check whether a ZIP entry is an XML document worth parsing.
+
+    Directory entries and the AppleDouble files macOS adds to archives
+    (``__MACOSX/...`` and ``._name.xml``) are skipped: they often end in
+    ".xml" but are not fiscal documents and would only fail to parse.
+
+    Args:
+        file_info: Central directory entry
+
+    Returns:
+        True for regular ``.xml`` members
+    """
+    name = file_info.filename
+    # Only the last four characters are lowercased; directory entries end
+    # in "/" and fail this check too
+    if name[-4:].lower() != ".xml" or name.startswith("__MACOSX/"):
+        return False
+    return not name.rpartition("/")[2].startswith("._")
+
+
 class FileProcessor:
     """Process uploaded XML and ZIP files."""
 
+    # Threads parsing the XMLs of one ZIP concurrently
+    ZIP_WORKERS = 4
+
     def __init__(self, database_url: str = "sqlite:///fiscal_documents.db", save_to_db: bool = True, auto_classify: bool = True):
         """
         Initialize processor with parser, validator, and classifier.
@@ -45,22 +90,29 @@ class FileProcessor:
         if auto_classify:
             logger.info("FileProcessor initialized with automatic classification and caching enabled")
 
-    def process_file(self, file_content: bytes, filename: str) -> List[Tuple[str, InvoiceModel, List]]:
+    def process_file(
+        self, file_content: Union[bytes, BinaryIO], filename: str
+    ) -> List[Tuple[str, InvoiceModel, List]]:
         """
         Process uploaded file (XML or ZIP).
 
         Args:
-            file_content: Raw file bytes
+            file_content: Raw file bytes or a seekable binary file object
+                (e.g. a Streamlit UploadedFile); ZIPs are read member by
+                member from the file object without copying the archive
             filename: Name of the uploaded file
 
         Returns:
             List of tuples: (filename, invoice, validation_issues)
         """
         results = []
+        suffix = file_suffix(filename)
 
-        if filename.lower().endswith(".zip"):
+        if suffix == "zip":
             results.extend(self._process_zip(file_content))
-        elif filename.lower().endswith(".xml"):
+        elif suffix == "xml":
+            if not isinstance(file_content, bytes):
+                file_content = file_content.read()
             result = self._process_xml(file_content, filename)
             if result:
                 results.append(result)
@@ -69,12 +121,12 @@ class FileProcessor:
 
         return results
 
-    def _process_zip(self, zip_content: bytes) -> List[Tuple[str, InvoiceModel, List]]:
+    def _process_zip(self, zip_content: Union[bytes, BinaryIO]) -> List[Tuple[str, InvoiceModel, List]]:
         """
         Extract and process all XML files from ZIP.
 
         Args:
-            zip_content: ZIP file bytes
+            zip_content: ZIP file bytes or seekable binary file object
 
         Returns:
             List of processed invoices
@@ -82,13 +134,30 @@ class FileProcessor:
         results = []
 
         try:
-            with zipfile.ZipFile(BytesIO(zip_content)) as zf:
-                for file_info in zf.filelist:
-                    if file_info.filename.lower().endswith(".xml"):
-                        xml_content = zf.read(file_info.filename)
-                        result = self._process_xml(xml_content, file_info.filename)
+            source = BytesIO(zip_content) if isinstance(zip_content, bytes) else zip_content
+            with zipfile.ZipFile(source) as zf:
+                members = [file_info for file_info in zf.filelist if is_xml_member(file_info)]
+                if self.save_to_db:
+                    # Saving runs inside _process_xml and the validator's
+                    # duplicate check reads what earlier members saved, so
+                    # members are processed one at a time in archive order
+                    for file_info in members:
+                        result = self._process_zip_member(zf, file_info)
                         if result:
                             results.append(result)
+                else:
+                    # Nothing is shared between members without a database:
+                    # each worker decompresses and parses its own member
+                    with ThreadPoolExecutor(max_workers=self.ZIP_WORKERS) as executor:
+                        futures = [
+                            executor.submit(self._process_zip_member, zf, file_info)
+                            for file_info in members
+                        ]
+                        # Collected in archive order
+                        for future in futures:
+                            result = future.result()
+                            if result:
+                                results.append(result)
 
             logger.info(f"Processed {len(results)} XMLs from ZIP")
 
@@ -99,6 +168,21 @@ class FileProcessor:
 
         return results
 
+    def _process_zip_member(
+        self, zf: zipfile.ZipFile, file_info: zipfile.ZipInfo
+    ) -> Tuple[str, InvoiceModel, List, Optional[dict]] | None:
+        """
+        Decompress and process one XML member of an open ZIP.
+
+        Args:
+            zf: Open archive
+            file_info: Central directory entry of the member
+
+        Returns:
+            Result of _process_xml for the member
+        """
+        return self._process_xml(zf.read(file_info), file_info.filename)
+
     def _process_xml(self, xml_content: bytes, filename: str) -> Tuple[str, InvoiceModel, List, Optional[dict]] | None:
         """
         Parse, validate, and classify a single XML file.
@@ -220,6 +304,33 @@ def format_items_table(invoice: InvoiceModel) -> str:
     return table
 
 
+def format_items_dataframe(invoice: InvoiceModel) -> pd.DataFrame:
+    """
+    Build invoice items as a DataFrame for st.dataframe.
+
+    Same columns as format_items_table, but typed columns are serialized via
+    Arrow and rendered in a virtualized grid instead of a markdown table.
+
+    Args:
+        invoice: Parsed invoice model
+
+    Returns:
+        DataFrame with one row per item (empty when there are no items)
+    """
+    items = invoice.items or []
+    return pd.DataFrame(
+        {
+            "#": [item.item_number for item in items],
+            "Produto": [item.description for item in items],
+            "NCM": [item.ncm or "-" for item in items],
+            "CFOP": [item.cfop or "-" for item in items],
+            "Qtd": [float(item.quantity) for item in items],
+            "Valor Unit.": [float(item.unit_price) for item in items],
+            "Total": [float(item.total_price) for item in items],
+        }
+    )
+
+
 def format_validation_issues(issues: List) -> str:
     """
     Format validation issues into a readable report.
@@ -315,3 +426,77 @@ def format_classification(classification: Optional[dict]) -> str:
         result += "\n\n🤖 _Classificação feita com auxílio de IA (LLM fallback)_"
 
     return result
+
+
+DOCUMENT_TYPE_EMOJI = {
+    "NFe": "🧾",
+    "NFCe": "🧾",
+    "CTe": "🚚",
+    "MDFe": "📋",
+}
+
+DOCUMENT_TYPE_LABEL = {
+    "NFe": "Electronic Invoice",
+    "NFCe": "Consumer Invoice",
+    "CTe": "Transport Knowledge",
+    "MDFe": "Manifest of Documents",
+}
+
+
+def format_result_details(
+    filename: str,
+    invoice: InvoiceModel,
+    issues: List,
+    classification: Optional[dict],
+) -> dict:
+    """
+    Format the display strings of a processed document once, at processing time.
+
+    Args:
+        filename: Name of the XML file
+        invoice: Parsed invoice model
+        issues: List of ValidationIssue objects
+        classification: Dict with classification results or None
+
+    Returns:
+        Dict with "title", "summary", "parties", "classification" and "issues"
+        markdown (the last two are None when there is nothing to show)
+    """
+    emoji = DOCUMENT_TYPE_EMOJI.get(invoice.document_type, "📄")
+    title = f"{emoji} **{invoice.document_type}** {invoice.document_number}"
+    if invoice.document_type in ["CTe", "MDFe"]:
+        title += f" - {filename}"
+    else:
+        title += f" - {invoice.issuer_name[:30]}..."
+
+    doc_label = DOCUMENT_TYPE_LABEL.get(invoice.document_type, invoice.document_type)
+
+    summary = f"""
+    **Type:** {doc_label}  
+    **Number:** {invoice.document_number}/{invoice.series}  
+    **Key:** `{invoice.document_key}`  
+    **Date:** {invoice.issue_date.strftime("%d/%m/%Y %H:%M")}
+    """
+
+    # Show different info based on document type
+    if invoice.document_type in ["CTe", "MDFe"]:
+        parties = f"""
+        **Carrier:** {invoice.issuer_name}  
+        **CNPJ:** {invoice.issuer_cnpj}  
+        **Origin:** {invoice.issuer_uf or "N/A"}  
+        **Destination:** {invoice.recipient_uf or "N/A"}
+        """
+    else:
+        parties = f"""
+        **Issuer:** {invoice.issuer_name}  
+        **CNPJ:** {invoice.issuer_cnpj}  
+        **Recipient:** {invoice.recipient_name or "N/A"}  
+        """
+
+    return {
+        "title": title,
+        "summary": summary,
+        "parties": parties,
+        "classification": format_classification(classification) if classification else None,
+        "issues": format_validation_issues(issues) if issues else None,
+    }
@@ -0,0 +1,145 @@
+"""Test streaming of the agent's final answer."""
+
+import queue
+import threading
+
+from src.agent import agent_core
+from src.agent.agent_core import FinalAnswerStreamHandler, FiscalDocumentAgent, PromptCache
+
+
+class FakeExecutor:
+    """Executor stub that replays tokens through the callbacks."""
+
+    def __init__(self, steps, output):
+        self.steps = steps
+        self.output = output
+
+    def invoke(self, inputs, config=None):
+        handler = config["callbacks"][0]
+        for step in self.steps:
+            handler.on_chat_model_start()
+            for token in step:
+                handler.on_llm_new_token(token)
+        return {"output": self.output}
+
+
+def _agent_with(executor):
+    agent = FiscalDocumentAgent.__new__(FiscalDocumentAgent)
+    agent.executor = executor
+    agent._conversation_lock = threading.Lock()
+    return agent
+
+
+def _drain(token_queue):
+    tokens = []
+    while not token_queue.empty():
+        tokens.append(token_queue.get())
+    return tokens
+
+
+def test_handler_forwards_only_final_answer():
+    """Thought/Action tokens are dropped, answer tokens are forwarded."""
+    token_queue = queue.Queue()
+    handler = FinalAnswerStreamHandler(token_queue)
+
+    handler.on_chat_model_start()
+    for token in ["Thought: check", "\nAction: db", "\nAction Input: x"]:
+        handler.on_llm_new_token(token)
+    assert _drain(token_queue) == []
+
+    handler.on_chat_model_start()
+    for token in ["Thought: done\nFinal ", "Answer: Temos", " 3 notas"]:
+        handler.on_llm_new_token(token)
+    assert "".join(_drain(token_queue)) == "Temos 3 notas"
+
+
+def test_stream_matches_final_output():
+    """Concatenated chunks equal the executor output."""
+    executor = FakeExecutor(
+        steps=[["Thought: ok\nAction: db"], ["Final Answer: Temos", " 3 notas"]],
+        output="Temos 3 notas de compra.",
+    )
+    chunks = list(_agent_with(executor).stream("quantas notas?"))
+    assert "".join(chunks) == "Temos 3 notas de compra."
+
+
+def test_stream_without_answer_tokens_yields_output():
+    """When nothing was streamed the full output is yielded once."""
+    executor = FakeExecutor(steps=[], output="Olá!")
+    assert list(_agent_with(executor).stream("oi")) == ["Olá!"]
+
+
+def test_fork_shares_llm_but_not_memory():
+    """Forked agents reuse the LLM client with an independent conversation."""
+    agent = FiscalDocumentAgent(api_key="test-key", use_context_cache=False)
+    forked = agent.fork()
+
+    agent.remember_exchange("oi", "Olá!")
+
+    assert forked.llm is agent.llm
+    assert forked.executor.memory is forked.memory
+    assert forked.memory.load_memory_variables({})["chat_history"] == []
+
+
+def test_history_digest_tracks_conversation():
+    """The digest is empty for a new conversation and changes with each turn."""
+    agent = FiscalDocumentAgent(api_key="test-key", use_context_cache=False)
+    assert agent.history_digest() == ""
+
+    agent.remember_exchange("oi", "Olá!")
+    first = agent.history_digest()
+    agent.remember_exchange("quantas notas?", "Temos 3 notas.")
+
+    assert first
+    assert agent.history_digest() != first
+    assert agent.fork().history_digest() == ""
+
+
+def test_cached_context_removes_static_prefix(monkeypatch):
+    """Once the shared cached context exists only the per-call part is sent."""
+    monkeypatch.setattr(PromptCache, "_create", lambda self: "cachedContents/test")
+    agent = FiscalDocumentAgent(api_key="test-key")
+    forked = agent.fork()
+
+    def render():
+        return agent.prompt.format(chat_history="", input="oi", tool_names="t", agent_scratchpad="")
+
+    # Nothing is created while the agent is built
+    assert agent.llm.cached_content is None
+    assert "FORMATO DE USO DAS FERRAMENTAS" in render()
+
+    forked._prepare_prompt_cache()
+
+    assert forked.prompt_cache is agent.prompt_cache
+    assert agent.llm.cached_content == "cachedContents/test"
+    assert "FORMATO DE USO DAS FERRAMENTAS" not in render()
+    assert "PERGUNTA DO USUÁRIO: oi" in render()
+
+
+def test_cached_context_failure_sends_full_prompt(monkeypatch):
+    """Any error creating the cached context falls back to the full prompt."""
+    def fail(*args, **kwargs):
+        raise RuntimeError("no transport")
+
+    monkeypatch.setattr(agent_core.glm, "CacheServiceClient", fail)
+    agent = FiscalDocumentAgent(api_key="test-key")
+    agent._prepare_prompt_cache()
+
+    rendered = agent.prompt.format(chat_history="", input="oi", tool_names="t", agent_scratchpad="")
+    assert agent.llm.cached_content is None
+    assert "FORMATO DE USO DAS FERRAMENTAS" in rendered
+
+
+def test_turns_are_serialized():
+    """A second turn waits until the running one releases the conversation."""
+    agent = FiscalDocumentAgent(api_key="test-key", use_context_cache=False)
+    agent.executor = FakeExecutor(steps=[], output="Olá!")
+
+    with agent._conversation_lock:
+        worker = threading.Thread(target=lambda: list(agent.stream("oi")))
+        worker.start()
+        worker.join(timeout=0.2)
+        assert worker.is_alive()
+
+    worker.join(timeout=5)
+    assert not worker.is_alive()
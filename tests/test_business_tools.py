@@ -16,7 +16,7 @@ from src.agent.business_tools import (
     ReportGeneratorTool,
 )
 from src.database.db import DatabaseManager, InvoiceDB
-from src.models import InvoiceModel, InvoiceItem
+from src.models import InvoiceModel, InvoiceItem, ValidationIssue, ValidationSeverity
 from src.services.external_validators import CNPJData
 
 
@@ -131,6 +131,38 @@ def test_report_generator_no_data():
     assert "Nenhum" in result or "não encontrado" in result.lower()
 
 
+def test_report_generator_issues_by_severity(tmp_path):
+    """Test issues report against a database with saved issues."""
+    db = DatabaseManager(f"sqlite:///{tmp_path / 'test.db'}")
+    for i in range(2):
+        invoice = InvoiceModel(
+            document_type="NFe",
+            document_key=f"{'3' * 43}{i}",
+            document_number=str(i + 1),
+            series="1",
+            issue_date=datetime(2024, 1, 15 + i, 10, 0, 0),
+            issuer_name="Empresa Teste LTDA",
+            issuer_cnpj="12345678000190",
+            recipient_name="Cliente Teste",
+            recipient_cnpj_cpf="98765432000100",
+            total_products=Decimal("100.00"),
+            total_invoice=Decimal("100.00"),
+            total_taxes=Decimal("0.00"),
+            raw_xml="<xml/>",
+        )
+        issues = [
+            ValidationIssue(code="VAL001", severity=ValidationSeverity.ERROR, message="Erro"),
+            ValidationIssue(code="VAL002", severity=ValidationSeverity.WARNING, message="Aviso"),
+        ]
+        db.save_invoice(invoice, issues)
+
+    result = ReportGeneratorTool()._generate_issues_by_severity(db, year=2024)
+
+    assert "Total de problemas: 4" in result
+    assert "ERROR: 2 problema(s)" in result
+    assert "[VAL001]" in result
+
+
 # ============================================================================
 # CLASSIFIER TOOL TESTS
 # ============================================================================
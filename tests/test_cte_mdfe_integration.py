@@ -93,6 +93,40 @@ class TestCTeMDFeIntegration:
         assert DocumentType.CTE in doc_types
         assert DocumentType.MDFE in doc_types
     
+    def test_process_zip_from_file_object(self):
+        """Test ZIP read directly from a file object (as Streamlit uploads are)."""
+        import zipfile
+        from io import BytesIO
+        
+        zip_buffer = BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w') as zf:
+            zf.writestr("cte_001.xml", SAMPLE_CTE_XML)
+            zf.writestr("mdfe_001.xml", SAMPLE_MDFE_XML)
+        zip_buffer.seek(0)
+        
+        results = self.processor.process_file(zip_buffer, "mixed_documents.zip")
+        
+        assert len(results) == 2
+        assert not zip_buffer.closed
+
+    def test_process_zip_with_duplicate_member_names(self):
+        """Test that ZIP entries sharing a name are each parsed."""
+        import warnings
+        import zipfile
+        from io import BytesIO
+
+        zip_buffer = BytesIO()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # zipfile warns on duplicate names
+            with zipfile.ZipFile(zip_buffer, 'w') as zf:
+                zf.writestr("doc.xml", SAMPLE_CTE_XML)
+                zf.writestr("doc.xml", SAMPLE_MDFE_XML)
+
+        results = self.processor.process_file(zip_buffer.getvalue(), "duplicates.zip")
+
+        doc_types = sorted(invoice.document_type for _, invoice, _, _ in results)
+        assert doc_types == [DocumentType.CTE, DocumentType.MDFE]
+
     def test_cte_validation_checks(self):
         """Test that CTe goes through fiscal validation."""
         results = self.processor.process_file(
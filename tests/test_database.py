@@ -126,6 +126,37 @@ def test_search_invoices(temp_db, sample_invoice, sample_issues):
     assert len(results) == 0
 
 
+def test_search_invoices_keyset_pagination(temp_db, sample_invoice):
+    """Test paging with an (issue_date, id) cursor, including same-date ties."""
+    dates = [
+        datetime(2024, 1, 15, 10, 30, 0, tzinfo=UTC),
+        datetime(2024, 1, 15, 10, 30, 0, tzinfo=UTC),
+        datetime(2024, 2, 1, 9, 0, 0, tzinfo=UTC),
+        datetime(2024, 3, 1, 9, 0, 0, tzinfo=UTC),
+    ]
+    for i, issue_date in enumerate(dates):
+        temp_db.save_invoice(
+            sample_invoice.model_copy(
+                update={"document_key": f"{sample_invoice.document_key[:-1]}{i}", "issue_date": issue_date}
+            ),
+            [],
+        )
+    
+    expected = [inv.id for inv in temp_db.search_invoices(limit=10)]
+    
+    seen = []
+    after_key = None
+    while True:
+        page = temp_db.search_invoices(limit=3, after_key=after_key)
+        if not page:
+            break
+        seen.extend(inv.id for inv in page)
+        after_key = (page[-1].issue_date, page[-1].id)
+    
+    assert seen == expected
+    assert len(seen) == 4
+
+
 def test_get_statistics(temp_db, sample_invoice, sample_issues):
     """Test getting database statistics."""
     temp_db.save_invoice(sample_invoice, sample_issues)
@@ -136,9 +167,46 @@ def test_get_statistics(temp_db, sample_invoice, sample_issues):
     assert stats["total_items"] == 1
     assert stats["total_issues"] == 2
     assert stats["by_type"]["NFe"] == 1
+    assert stats["by_type_items"] == (("NFe", 1),)
     assert stats["total_value"] > 0
 
 
+def test_get_statistics_period_filter(temp_db, sample_invoice, sample_issues):
+    """Test statistics aggregates respect the year/month filter."""
+    temp_db.save_invoice(sample_invoice, sample_issues)
+    
+    stats = temp_db.get_statistics(year=2024, month=1)
+    assert stats["total_invoices"] == 1
+    assert stats["total_items"] == 1
+    assert stats["total_issues"] == 2
+    assert stats["total_value"] == pytest.approx(115.0)
+    
+    stats = temp_db.get_statistics(year=2023)
+    assert stats["total_invoices"] == 0
+    assert stats["total_items"] == 0
+    assert stats["total_issues"] == 0
+    assert stats["by_type"] == {}
+    assert stats["total_value"] == 0
+
+
+def test_get_cache_statistics(temp_db):
+    """Test cache statistics are aggregated from stored entries."""
+    assert temp_db.get_cache_statistics()["total_entries"] == 0
+    
+    classification = {"operation_type": "purchase", "cost_center": "CC001", "confidence": 0.9}
+    temp_db.save_classification_to_cache("key-a", "12345678000190", "12345678", "1102", classification)
+    temp_db.save_classification_to_cache("key-b", "12345678000190", None, "5102", classification)
+    temp_db.get_classification_from_cache("key-a")
+    temp_db.get_classification_from_cache("key-a")
+    temp_db.get_classification_from_cache("key-b")
+    
+    stats = temp_db.get_cache_statistics()
+    assert stats["total_entries"] == 2
+    assert stats["total_hits"] == 3
+    assert stats["avg_hits_per_entry"] == pytest.approx(1.5)
+    assert stats["cache_effectiveness"] == pytest.approx(60.0)
+
+
 def test_delete_invoice(temp_db, sample_invoice, sample_issues):
     """Test deleting an invoice."""
     temp_db.save_invoice(sample_invoice, sample_issues)
@@ -249,6 +317,23 @@ def test_bulk_insert_with_duplicates(temp_db, sample_invoice, sample_issues):
     assert len(all_invoices) == 2
 
 
+def test_bulk_insert_repeated_key_in_batch(temp_db, sample_invoice, sample_issues):
+    """Test a key repeated within one batch is inserted and indexed once."""
+    batch = [
+        (sample_invoice, sample_issues, None),
+        (sample_invoice, sample_issues, None),
+    ]
+    
+    result = temp_db.save_invoices_batch(batch)
+    
+    assert len(result) == 2
+    assert result[0].id == result[1].id
+    assert len(result[0].items) == 1
+    assert temp_db.count_invoices() == 1
+    if temp_db.fts_enabled:
+        assert len(temp_db.search_invoices(q="Empresa")) == 1
+
+
 def test_bulk_insert_with_classification(temp_db, sample_invoice, sample_issues):
     """Test bulk insert with classification data."""
     classification = {
@@ -350,3 +435,115 @@ def test_bulk_insert_performance(temp_db, sample_invoice, sample_issues, benchma
         # On larger batches (100+), speedup is 5-10x.
         assert (bulk_time / 50) <= avg_individual * 1.5  # Allow some variance
 
+
+
+def test_data_version_tracks_writes(temp_db, sample_invoice, sample_issues):
+    """Test data_version changes on invoice writes only."""
+    version = temp_db.data_version
+    
+    temp_db.save_invoice(sample_invoice, sample_issues)
+    assert temp_db.data_version > version
+    
+    version = temp_db.data_version
+    temp_db.search_invoices()
+    temp_db.count_invoices()
+    assert temp_db.data_version == version
+
+    # Cache and chat writes leave invoice-derived caches valid
+    temp_db.save_llm_response_to_cache("key", "prompt", "response", "gemini")
+    temp_db.get_llm_response_from_cache("key", 600)
+    temp_db.save_chat_messages("session", [{"role": "user", "content": "oi"}])
+    assert temp_db.data_version == version
+
+    temp_db.delete_invoice(sample_invoice.document_key)
+    assert temp_db.data_version > version
+
+
+def test_get_validation_issues_bulk(temp_db, sample_invoice, sample_issues):
+    """Test loading issues for several invoices at once."""
+    saved = temp_db.save_invoice(sample_invoice, sample_issues)
+    
+    issues_map = temp_db.get_validation_issues_bulk([saved.id, saved.id + 1])
+    
+    assert len(issues_map[saved.id]) == 2
+    assert saved.id + 1 not in issues_map
+    assert temp_db.get_validation_issues_bulk([]) == {}
+
+
+def test_get_page_boundary_key(temp_db, sample_invoice):
+    """Test that the boundary key seeks to the same rows as OFFSET."""
+    for i in range(5):
+        temp_db.save_invoice(
+            sample_invoice.model_copy(
+                update={
+                    "document_key": f"{sample_invoice.document_key[:-1]}{i}",
+                    "issue_date": datetime(2024, 1, 1 + i, tzinfo=UTC),
+                }
+            ),
+            [],
+        )
+    
+    assert temp_db.get_page_boundary_key(2, 1) is None
+    assert temp_db.get_page_boundary_key(2, 4) is None
+    
+    after_key = temp_db.get_page_boundary_key(2, 3)
+    by_offset = [row.id for row in temp_db.search_invoices_summary(limit=2, offset=4)]
+    by_key = [row.id for row in temp_db.search_invoices_summary(limit=2, after_key=after_key)]
+    assert by_key == by_offset
+    
+    assert temp_db.get_page_boundary_key(2, 2, document_type="CTe") is None
+
+
+def test_search_invoices_summary(temp_db, sample_invoice, sample_issues):
+    """Test the projected list query with the items count subquery."""
+    saved = temp_db.save_invoice(sample_invoice, sample_issues)
+    
+    rows = temp_db.search_invoices_summary(document_type="NFe")
+    assert len(rows) == 1
+    assert rows[0].id == saved.id
+    assert rows[0].items_count == 1
+    assert rows[0].issuer_name == "Empresa Teste LTDA"
+    
+    assert temp_db.search_invoices_summary(document_type="CTe") == []
+
+
+def test_chat_messages_roundtrip(temp_db):
+    """Test chat history is stored per session and read back in order."""
+    temp_db.save_chat_messages("s1", [
+        {"role": "user", "content": "quantas notas?"},
+        {"role": "assistant", "content": "Temos 3 notas."},
+    ])
+    temp_db.save_chat_messages("s2", [{"role": "user", "content": "oi"}])
+    temp_db.save_chat_messages("s1", [{"role": "user", "content": "e em 2023?"}])
+
+    messages = temp_db.get_chat_messages("s1")
+
+    assert [m["content"] for m in messages] == ["quantas notas?", "Temos 3 notas.", "e em 2023?"]
+    assert messages[1]["role"] == "assistant"
+    assert temp_db.get_chat_messages("missing") == []
+
+
+def test_chat_messages_pruned_and_cleared(temp_db, monkeypatch):
+    """Test chat history is capped per session, expires and can be deleted."""
+    from sqlmodel import Session
+
+    from src.database.db import ChatMessageDB
+
+    monkeypatch.setattr(DatabaseManager, "CHAT_MESSAGES_PER_SESSION", 3)
+    with Session(temp_db.engine) as session:
+        session.add(ChatMessageDB(
+            session_id="old", role="user", content="antiga",
+            created_at=datetime(2020, 1, 1, tzinfo=UTC),
+        ))
+        session.commit()
+
+    for i in range(5):
+        temp_db.save_chat_messages("s1", [{"role": "user", "content": str(i)}])
+    temp_db.save_chat_messages("s2", [{"role": "user", "content": "oi"}])
+
+    assert [m["content"] for m in temp_db.get_chat_messages("s1")] == ["2", "3", "4"]
+    assert temp_db.get_chat_messages("old") == []
+
+    assert temp_db.delete_chat_messages("s1") == 3
+    assert temp_db.get_chat_messages("s1") == []
+    assert len(temp_db.get_chat_messages("s2")) == 1
@@ -1,14 +1,19 @@
 """Test file processing utilities."""
 
 import pytest
+import zipfile
 from datetime import datetime, UTC
 from decimal import Decimal
 
 from src.utils.file_processing import (
     FileProcessor,
+    file_suffix,
     format_invoice_summary,
+    format_items_dataframe,
     format_items_table,
+    format_result_details,
     format_validation_issues,
+    is_xml_member,
 )
 from src.models import InvoiceModel, InvoiceItem, TaxDetails, ValidationIssue, ValidationSeverity
 
@@ -88,6 +93,46 @@ def test_format_items_table():
     assert ("100,00" in table or "100.00" in table)
 
 
+def test_format_items_dataframe():
+    """Test items DataFrame for the results grid."""
+    invoice = InvoiceModel(
+        document_type="NFe",
+        document_key="35240112345678000190550010000000011234567890",
+        document_number="1",
+        series="1",
+        issue_date=datetime.now(UTC),
+        issuer_name="Test",
+        issuer_cnpj="12345678000190",
+        total_products=Decimal("100.00"),
+        total_invoice=Decimal("100.00"),
+        total_taxes=Decimal("0.00"),
+        items=[
+            InvoiceItem(
+                item_number=1,
+                product_code="PROD001",
+                description="Produto Teste Completo",
+                ncm=None,
+                cfop="5102",
+                unit="UN",
+                quantity=Decimal("2.00"),
+                unit_price=Decimal("50.00"),
+                total_price=Decimal("100.00"),
+            )
+        ],
+        raw_xml="<xml/>",
+    )
+
+    df = format_items_dataframe(invoice)
+
+    assert list(df.columns) == ["#", "Produto", "NCM", "CFOP", "Qtd", "Valor Unit.", "Total"]
+    assert df.iloc[0]["NCM"] == "-"
+    assert df["Total"].dtype == float
+    assert df.iloc[0]["Total"] == 100.0
+
+    invoice.items = []
+    assert format_items_dataframe(invoice).empty
+
+
 def test_format_validation_issues_no_issues():
     """Test formatting when there are no issues."""
     result = format_validation_issues([])
@@ -128,3 +173,50 @@ def test_format_validation_issues_with_issues():
     assert "VAL003" in result
     assert "Invalid document key" in result
     assert "Check the key format" in result
+
+
+def test_format_result_details():
+    """Test display strings built for an upload result."""
+    invoice = InvoiceModel(
+        document_type="CTe",
+        document_key="35240112345678000190570010000000011234567890",
+        document_number="7",
+        series="1",
+        issue_date=datetime(2024, 1, 15, 10, 30, 0, tzinfo=UTC),
+        issuer_name="Transportadora Teste",
+        issuer_cnpj="12345678000190",
+        issuer_uf="SP",
+        recipient_uf="RJ",
+        total_products=Decimal("50.00"),
+        total_invoice=Decimal("50.00"),
+        total_taxes=Decimal("0.00"),
+        items=[],
+        raw_xml="<xml/>",
+    )
+
+    details = format_result_details("cte.xml", invoice, [], None)
+
+    assert details["title"] == "🚚 **CTe** 7 - cte.xml"
+    assert "Transport Knowledge" in details["summary"]
+    assert "15/01/2024 10:30" in details["summary"]
+    assert "**Origin:** SP" in details["parties"]
+    assert details["classification"] is None
+    assert details["issues"] is None
+
+
+def test_file_suffix():
+    """Test extension detection used to route XML and ZIP files."""
+    assert file_suffix("NOTA.XML") == "xml"
+    assert file_suffix("lote/2024.01/nfe.xml") == "xml"
+    assert file_suffix("docs.Zip") == "zip"
+    assert file_suffix("README") == ""
+    assert file_suffix("nfe.xml.bak") == "bak"
+
+
+def test_is_xml_member():
+    """Test that only regular XML entries of a ZIP are processed."""
+    assert is_xml_member(zipfile.ZipInfo("lote/NFE_001.XML"))
+    assert not is_xml_member(zipfile.ZipInfo("lote/"))
+    assert not is_xml_member(zipfile.ZipInfo("lote/leia-me.txt"))
+    assert not is_xml_member(zipfile.ZipInfo("__MACOSX/lote/._NFE_001.XML"))
+    assert not is_xml_member(zipfile.ZipInfo("lote/._NFE_001.XML"))
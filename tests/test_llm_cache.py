@@ -0,0 +1,75 @@
+"""Test the chat response cache."""
+
+import pytest
+
+from src.agent.llm_cache import LLMCache
+from src.database.db import DatabaseManager
+
+
+@pytest.fixture
+def llm_cache(tmp_path):
+    """Create a response cache backed by a temporary database."""
+    db = DatabaseManager(f"sqlite:///{tmp_path / 'test.db'}")
+    return LLMCache(db, ttl_seconds=600)
+
+
+def test_cache_key_is_deterministic():
+    """Same payload produces the same key regardless of dict ordering."""
+    key1 = LLMCache.cache_key("gemini", [{"role": "user", "content": "oi"}], 0.0)
+    key2 = LLMCache.cache_key("gemini", [{"content": "oi", "role": "user"}], 0.0)
+    assert key1 == key2
+    assert key1 != LLMCache.cache_key("gemini", [{"role": "user", "content": "oi"}], 0.3)
+
+
+def test_exact_and_normalized_hits(llm_cache):
+    """Repeated and trivially reworded prompts hit the cache."""
+    assert llm_cache.get("gemini", "Total por fornecedor em 2024?", 0.3) is None
+
+    llm_cache.set("gemini", "Total por fornecedor em 2024?", 0.3, "Resposta")
+
+    assert llm_cache.get("gemini", "Total por fornecedor em 2024?", 0.3) == "Resposta"
+    assert llm_cache.get("gemini", "  total POR fornecedor em 2024 ", 0.3) == "Resposta"
+    assert llm_cache.get("other-model", "Total por fornecedor em 2024?", 0.3) is None
+
+
+def test_short_and_error_responses_not_cached(llm_cache):
+    """Context-dependent follow-ups and error replies are never cached."""
+    llm_cache.set("gemini", "e 2023?", 0.3, "Resposta")
+    assert llm_cache.get("gemini", "e 2023?", 0.3) is None
+
+    llm_cache.set("gemini", "quantas notas de compra temos", 0.3, "❌ Erro")
+    assert llm_cache.get("gemini", "quantas notas de compra temos", 0.3) is None
+
+
+def test_expired_entries_ignored(tmp_path):
+    """Entries older than the TTL are treated as misses."""
+    db = DatabaseManager(f"sqlite:///{tmp_path / 'test.db'}")
+    LLMCache(db).set("gemini", "quantas notas de compra temos", 0.3, "Resposta")
+
+    assert LLMCache(db, ttl_seconds=0).get("gemini", "quantas notas de compra temos", 0.3) is None
+
+
+def test_time_sensitive_prompts_not_cached(llm_cache):
+    """Prompts relative to the current date are never cached."""
+    llm_cache.set("gemini", "quantas notas recebemos hoje?", 0.3, "Resposta")
+    assert llm_cache.get("gemini", "quantas notas recebemos hoje?", 0.3) is None
+
+    llm_cache.set("gemini", "total de compras este mês", 0.3, "Resposta")
+    assert llm_cache.get("gemini", "total de compras este mês", 0.3) is None
+
+
+def test_clear_removes_entries(llm_cache):
+    """Clearing the cache turns previous hits into misses."""
+    llm_cache.set("gemini", "Total por fornecedor em 2024?", 0.3, "Resposta")
+
+    assert llm_cache.clear() == 2  # Exact and normalized tiers
+    assert llm_cache.get("gemini", "Total por fornecedor em 2024?", 0.3) is None
+
+
+def test_followup_keyed_on_history(llm_cache):
+    """The same follow-up after a different conversation misses the cache."""
+    llm_cache.set("gemini", "e para o outro fornecedor?", 0.3, "Resposta", history="abc")
+
+    assert llm_cache.get("gemini", "e para o outro fornecedor?", 0.3, history="abc") == "Resposta"
+    assert llm_cache.get("gemini", "e para o outro fornecedor?", 0.3, history="def") is None
+    assert llm_cache.get("gemini", "e para o outro fornecedor?", 0.3) is None
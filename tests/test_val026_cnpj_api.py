@@ -278,6 +278,32 @@ class TestCNPJValidatorService:
         # Note: This assertion may be flaky due to network conditions
         # assert time2 < time1 * 0.5
 
+    def test_cnpj_validator_cache_is_bounded(self, monkeypatch):
+        """Test that the cache evicts least recently used and expired entries."""
+        from datetime import timedelta
+        from types import SimpleNamespace
+        from src.services.external_validators import CNPJValidator
+
+        monkeypatch.setattr(CNPJValidator, "CACHE_MAX_ENTRIES", 2)
+        validator = CNPJValidator(timeout=10.0)
+
+        def data(cnpj):
+            # The cache never inspects the entries
+            return SimpleNamespace(cnpj=cnpj)
+
+        validator._store_cached("1", data("1"))
+        validator._store_cached("2", data("2"))
+        assert validator._get_cached("1") is not None  # "2" is now least recent
+        validator._store_cached("3", data("3"))
+
+        assert validator._get_cached("2") is None
+        assert validator._get_cached("1").cnpj == "1"
+        assert len(validator._cache) == 2
+
+        monkeypatch.setattr(CNPJValidator, "CACHE_TTL", timedelta(0))
+        assert validator._get_cached("3") is None
+        assert "3" not in validator._cache
+
 
 if __name__ == "__main__":
     # Run with: python -m pytest tests/test_val026_cnpj_api.py -v